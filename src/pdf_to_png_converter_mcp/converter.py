@@ -5,16 +5,23 @@ from __future__ import annotations
 import asyncio
 import functools
 import logging
+import os
 import subprocess
 import sys
+import tempfile
+from collections.abc import Callable
 from pathlib import Path
-from typing import TYPE_CHECKING, Any
-
-if TYPE_CHECKING:
-    from PIL.Image import Image
+from typing import Any
 
 logger = logging.getLogger("pdf-to-png-mcp.converter")
 
+# 只在載入模組時檢查一次 pdf2image 是否可用
+_convert_from_path: Callable[..., list[Any]] | None
+try:
+    from pdf2image import convert_from_path as _convert_from_path
+except ImportError:
+    _convert_from_path = None
+
 # Windows-specific flag for hiding console window
 _CREATION_FLAGS: int = 0
 if sys.platform == "win32":
@@ -25,6 +32,7 @@ async def convert_pdf_to_png(
     pdf_path: Path,
     output_dir: Path,
     dpi: int = 1200,
+    workers: int | None = None,
 ) -> list[Path]:
     """將 PDF 檔案轉換為 PNG 圖片.
 
@@ -32,6 +40,8 @@ async def convert_pdf_to_png(
         pdf_path: PDF 檔案路徑
         output_dir: 輸出目錄
         dpi: 輸出解析度（DPI）
+        workers: 此檔案可同時使用的渲染行程數（預設為 CPU 核心數）；
+            同時轉換多個檔案時應由呼叫端分配，避免總數超過核心數
 
     Returns:
         生成的 PNG 檔案路徑列表
@@ -43,69 +53,85 @@ async def convert_pdf_to_png(
     if not pdf_path.exists():
         raise FileNotFoundError(f"找不到 PDF 檔案: {pdf_path}")
 
-    output_dir.mkdir(parents=True, exist_ok=True)
+    if not output_dir.is_dir():
+        output_dir.mkdir(parents=True, exist_ok=True)
     output_base = output_dir / pdf_path.stem
 
     # 嘗試使用 pdf2image（Python 套件）或 pdftoppm（命令列工具）
-    try:
-        return await _convert_with_pdf2image(pdf_path, output_dir, dpi)
-    except ImportError:
-        logger.info("pdf2image 不可用，嘗試使用 pdftoppm")
-    except Exception as e:
-        logger.warning(f"pdf2image 轉換失敗: {e}，嘗試使用 pdftoppm")
+    if _convert_from_path is None:
+        logger.info("pdf2image 不可用，使用 pdftoppm")
+    else:
+        try:
+            return await _convert_with_pdf2image(pdf_path, output_dir, dpi, workers)
+        except Exception as e:
+            logger.warning("pdf2image 轉換失敗: %s，嘗試使用 pdftoppm", e)
+
+    return await _convert_with_pdftoppm(pdf_path, output_base, dpi, workers)
+
 
-    return await _convert_with_pdftoppm(pdf_path, output_base, dpi)
+def _worker_count(workers: int | None) -> int:
+    """決定單一檔案的渲染行程數；未指定時使用 CPU 核心數."""
+    if workers is None:
+        workers = os.cpu_count() or 1
+    return max(1, workers)
+
+
+def _render_pages(
+    convert_from_path: Callable[..., list[Any]],
+    pdf_path: Path,
+    output_dir: Path,
+    dpi: int,
+    workers: int | None = None,
+) -> list[Path]:
+    """讓 pdftoppm 以多個行程平行渲染並直接寫出 PNG，再依頁碼重新命名."""
+    # 保留一個核心給事件迴圈
+    thread_count = max(1, _worker_count(workers) - 1)
+
+    # pdf2image 的輸出檔名帶有 uuid，先寫到同一檔案系統的暫存目錄再搬移
+    with tempfile.TemporaryDirectory(dir=output_dir) as tmp_dir:
+        rendered = convert_from_path(
+            str(pdf_path),
+            dpi=dpi,
+            output_folder=tmp_dir,
+            fmt="png",
+            paths_only=True,
+            thread_count=thread_count,
+        )
 
+        stem = pdf_path.stem
+        png_files = [output_dir / f"{stem}-{page:03d}.png" for page in range(1, len(rendered) + 1)]
+        for rendered_path, output_path in zip(rendered, png_files, strict=True):
+            os.replace(rendered_path, output_path)
 
-def _save_image(image: Image, path: Path) -> None:
-    """Save image to file."""
-    image.save(str(path), "PNG")
+    return png_files
 
 
 async def _convert_with_pdf2image(
     pdf_path: Path,
     output_dir: Path,
     dpi: int,
+    workers: int | None = None,
 ) -> list[Path]:
     """使用 pdf2image 套件轉換 PDF."""
-    from pdf2image import convert_from_path
+    convert_from_path = _convert_from_path
+    if convert_from_path is None:
+        raise ImportError("pdf2image 未安裝")
 
     # 在執行緒池中執行以避免阻塞
-    loop = asyncio.get_event_loop()
-    images: list[Any] = await loop.run_in_executor(
+    loop = asyncio.get_running_loop()
+    png_files: list[Path] = await loop.run_in_executor(
         None,
-        functools.partial(convert_from_path, str(pdf_path), dpi=dpi),
+        functools.partial(_render_pages, convert_from_path, pdf_path, output_dir, dpi, workers),
     )
 
-    png_files: list[Path] = []
-    for i, image in enumerate(images, start=1):
-        output_path = output_dir / f"{pdf_path.stem}-{i:03d}.png"
-        await loop.run_in_executor(
-            None,
-            functools.partial(_save_image, image, output_path),
-        )
-        png_files.append(output_path)
-        logger.info(f"已生成: {output_path.name}")
+    for png_file in png_files:
+        logger.info("已生成: %s", png_file.name)
 
     return png_files
 
 
-async def _convert_with_pdftoppm(
-    pdf_path: Path,
-    output_base: Path,
-    dpi: int,
-) -> list[Path]:
-    """使用 pdftoppm 命令列工具轉換 PDF."""
-    cmd = [
-        "pdftoppm",
-        "-png",
-        "-r",
-        str(dpi),
-        str(pdf_path),
-        str(output_base),
-    ]
-
-    # 建立 subprocess 參數
+def _subprocess_kwargs() -> dict[str, Any]:
+    """建立 poppler 命令列工具的 subprocess 參數."""
     kwargs: dict[str, Any] = {
         "stdout": asyncio.subprocess.PIPE,
         "stderr": asyncio.subprocess.PIPE,
@@ -115,13 +141,87 @@ async def _convert_with_pdftoppm(
     if sys.platform == "win32":
         kwargs["creationflags"] = _CREATION_FLAGS
 
-    process = await asyncio.create_subprocess_exec(*cmd, **kwargs)
+    return kwargs
+
 
-    _, stderr = await process.communicate()
+async def _get_page_count(pdf_path: Path) -> int | None:
+    """使用 pdfinfo 取得 PDF 頁數，無法取得時回傳 None."""
+    try:
+        process = await asyncio.create_subprocess_exec(
+            "pdfinfo", str(pdf_path), **_subprocess_kwargs()
+        )
+    except OSError:
+        return None
 
+    stdout, _ = await process.communicate()
     if process.returncode != 0:
+        return None
+
+    for line in stdout.decode("utf-8", errors="replace").splitlines():
+        if line.startswith("Pages:"):
+            try:
+                return int(line.split(":", 1)[1])
+            except ValueError:
+                return None
+    return None
+
+
+def _split_page_ranges(page_count: int, shards: int) -> list[tuple[int, int]]:
+    """將 1..page_count 平均切成 shards 段連續頁碼範圍."""
+    base, extra = divmod(page_count, shards)
+    ranges: list[tuple[int, int]] = []
+    first = 1
+    for i in range(shards):
+        last = first + base + (1 if i < extra else 0) - 1
+        ranges.append((first, last))
+        first = last + 1
+    return ranges
+
+
+async def _convert_with_pdftoppm(
+    pdf_path: Path,
+    output_base: Path,
+    dpi: int,
+    workers: int | None = None,
+) -> list[Path]:
+    """使用 pdftoppm 命令列工具轉換 PDF.
+
+    多頁 PDF 會依 workers（預設為 CPU 核心數）切成數段頁碼範圍，同時啟動多個 pdftoppm 行程。
+    pdftoppm 以絕對頁碼命名輸出檔案，因此各段輸出不會互相衝突。
+    """
+    # 只有一個 worker 時不會切段，省下啟動 pdfinfo 的額外行程
+    max_shards = _worker_count(workers)
+    page_count = await _get_page_count(pdf_path) if max_shards > 1 else None
+    shards = min(page_count or 1, max_shards)
+
+    page_args: list[list[str]] = [[]]
+    if page_count and shards > 1:
+        page_args = [
+            ["-f", str(first), "-l", str(last)]
+            for first, last in _split_page_ranges(page_count, shards)
+        ]
+
+    async def _run(extra_args: list[str]) -> tuple[int | None, bytes]:
+        cmd = [
+            "pdftoppm",
+            "-png",
+            "-r",
+            str(dpi),
+            *extra_args,
+            str(pdf_path),
+            str(output_base),
+        ]
+        process = await asyncio.create_subprocess_exec(*cmd, **_subprocess_kwargs())
+        _, stderr = await process.communicate()
+        return process.returncode, stderr
+
+    outcomes = await asyncio.gather(*(_run(extra_args) for extra_args in page_args))
+
+    for returncode, stderr in outcomes:
+        if returncode == 0:
+            continue
         error_msg = stderr.decode("utf-8", errors="replace").strip()
-        if "not found" in error_msg.lower() or process.returncode == 1:
+        if "not found" in error_msg.lower() or returncode == 1:
             raise FileNotFoundError(
                 "找不到 pdftoppm 工具。請安裝 poppler-utils:\n"
                 "  - Windows: 下載 poppler 並加入 PATH\n"
@@ -130,15 +230,24 @@ async def _convert_with_pdftoppm(
             )
         raise RuntimeError(f"pdftoppm 轉換失敗: {error_msg}")
 
-    # 搜尋生成的 PNG 檔案
+    # 搜尋生成的 PNG 檔案（pdftoppm 輸出為 {base}-{頁碼}.png，頁碼已補零）；
+    # 前綴與副檔名之間必須全為數字，才不會誤收 "{base}-2-1.png" 這類其他 PDF 的輸出
     output_dir = output_base.parent
-    pattern = f"{output_base.name}*.png"
-    png_files = sorted(output_dir.glob(pattern))
+    prefix = f"{output_base.name}-"
+    with os.scandir(output_dir) as entries:
+        names = sorted(
+            entry.name
+            for entry in entries
+            if entry.name.startswith(prefix)
+            and entry.name.endswith(".png")
+            and entry.name[len(prefix) : -4].isdigit()
+        )
+    png_files = [output_dir / name for name in names]
 
     if not png_files:
         raise RuntimeError("轉換完成但找不到輸出的 PNG 檔案")
 
     for png_file in png_files:
-        logger.info(f"已生成: {png_file.name}")
+        logger.info("已生成: %s", png_file.name)
 
     return png_files
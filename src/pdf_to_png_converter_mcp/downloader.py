@@ -2,15 +2,24 @@
 
 from __future__ import annotations
 
+import asyncio
 import logging
+import os
+import random
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable
 from pathlib import Path
-from typing import Any
+from typing import Any, TypeVar
 
 import aiofiles  # type: ignore[import-untyped]
 import httpx
+import orjson
 
 logger = logging.getLogger("pdf-to-png-mcp.downloader")
 
+_T = TypeVar("_T")
+
 # 常見的學術網站 User-Agent
 USER_AGENT = (
     "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
@@ -21,11 +30,109 @@ USER_AGENT = (
 # 預設超時設定（秒）
 DEFAULT_TIMEOUT = 60.0
 
+# 串流下載時每次寫入的區塊大小（位元組）
+DOWNLOAD_CHUNK_SIZE = 1 << 20
+
+# Content-Length 小於此值時一次讀完整個回應（位元組）
+SMALL_DOWNLOAD_SIZE = 256 * 1024
+
+# PDF 檔頭；規範允許其前方有少量雜訊，因此在前 1024 位元組內搜尋
+PDF_MAGIC = b"%PDF-"
+PDF_MAGIC_SEARCH_LIMIT = 1024
+
+# 暫時性錯誤的重試設定：可重試的 HTTP 狀態碼、最多嘗試次數與單次最長等待（秒）
+RETRY_STATUS_CODES = frozenset({429, 500, 502, 503, 504})
+MAX_ATTEMPTS = 5
+MAX_RETRY_DELAY = 30.0
+
+# 退避等待的掛鉤：測試只替換這裡，不動到共用事件迴圈上的 asyncio.sleep
+_sleep = asyncio.sleep
+
+# 阻塞檔案操作（建立目錄、換名）移到執行緒的掛鉤，理由同上
+_to_thread = asyncio.to_thread
+
+# Semantic Scholar 搜尋 API；網址、欄位與逾時在載入時建好，每次查詢直接重用
+_SEARCH_API_URL = httpx.URL("https://api.semanticscholar.org/graph/v1/paper/search")
+_SEARCH_FIELDS = "title,authors,year,venue,openAccessPdf"
+_SEARCH_TIMEOUT = httpx.Timeout(30.0)
+
+# 搜尋結果快取：Semantic Scholar 有速率限制，短時間內的重複查詢直接重用結果
+SEARCH_CACHE_SIZE = 256
+SEARCH_CACHE_TTL = 300.0  # 秒
+
+# 以 tuple 保存副本，呼叫端修改回傳的列表不會汙染快取
+_search_cache: OrderedDict[tuple[str, int], tuple[float, tuple[dict[str, str], ...]]] = (
+    OrderedDict()
+)
+
+# 連線池設定：下載與搜尋共用 keep-alive 連線，避免每次請求重新握手
+_CONNECTION_LIMITS = httpx.Limits(max_connections=32, max_keepalive_connections=16)
+
+_client: httpx.AsyncClient | None = None
+
+
+def get_client() -> httpx.AsyncClient:
+    """取得共用的 HTTP 客戶端（HTTP/2 + 連線池），首次呼叫時建立."""
+    global _client
+    if _client is None:
+        _client = httpx.AsyncClient(
+            http2=True,
+            follow_redirects=True,
+            timeout=httpx.Timeout(DEFAULT_TIMEOUT),
+            headers={"User-Agent": USER_AGENT},
+            limits=_CONNECTION_LIMITS,
+        )
+    return _client
+
+
+async def close_client() -> None:
+    """關閉共用的 HTTP 客戶端（服務器結束時呼叫）."""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+def _warn_if_not_pdf(head: bytes, url: str) -> None:
+    """檢查內容開頭的 PDF 檔頭，不符時記錄警告（不依賴可能錯誤的 Content-Type）."""
+    if PDF_MAGIC not in head[:PDF_MAGIC_SEARCH_LIMIT]:
+        logger.warning("警告: 下載內容不是 PDF（找不到 %%PDF- 檔頭）: %s，但仍嘗試儲存檔案", url)
+
+
+def _retry_delay(attempt: int, error: httpx.HTTPError) -> float | None:
+    """計算第 attempt 次失敗後的等待秒數；不值得重試的錯誤回傳 None."""
+    if isinstance(error, httpx.HTTPStatusError):
+        if error.response.status_code not in RETRY_STATUS_CODES:
+            return None
+        # 伺服器有指定 Retry-After（秒）時以其為準
+        retry_after = error.response.headers.get("retry-after", "")
+        if retry_after.isdigit():
+            return min(MAX_RETRY_DELAY, float(retry_after))
+    elif not isinstance(error, httpx.TimeoutException):
+        return None
+    return min(MAX_RETRY_DELAY, 0.5 * 2.0**attempt) + random.uniform(0, 0.25)
+
+
+async def _with_retry(request: Callable[[], Awaitable[_T]]) -> _T:
+    """執行請求，遇到 429/5xx 或逾時以指數退避重試，最多 MAX_ATTEMPTS 次."""
+    attempt = 0
+    while True:
+        try:
+            return await request()
+        except (httpx.HTTPStatusError, httpx.TimeoutException) as e:
+            delay = _retry_delay(attempt, e)
+            attempt += 1
+            if delay is None or attempt >= MAX_ATTEMPTS:
+                raise
+            logger.warning("請求失敗 (%s)，%.1f 秒後重試（第 %d 次）", e, delay, attempt)
+            await _sleep(delay)
+
 
 async def download_paper(
     url: str,
     output_path: Path,
     timeout: float = DEFAULT_TIMEOUT,
+    client: httpx.AsyncClient | None = None,
 ) -> Path:
     """從網路下載論文 PDF.
 
@@ -33,90 +140,161 @@ async def download_paper(
         url: PDF 下載網址
         output_path: 儲存路徑
         timeout: 下載超時時間（秒）
+        client: 使用的 HTTP 客戶端（可選，預設為共用客戶端）
 
     Returns:
         儲存的檔案路徑
 
     Raises:
-        httpx.HTTPStatusError: HTTP 請求失敗
-        httpx.TimeoutException: 下載超時
+        httpx.HTTPStatusError: HTTP 請求失敗（429/5xx 會先重試）
+        httpx.TimeoutException: 下載超時（重試後仍逾時）
         IOError: 檔案寫入失敗
     """
-    logger.info(f"開始下載: {url}")
+    logger.info("開始下載: %s", url)
 
-    # 確保輸出目錄存在
-    output_path.parent.mkdir(parents=True, exist_ok=True)
+    # 確保輸出目錄存在；在執行緒中建立，網路磁碟較慢時不會卡住其他並行下載
+    await _to_thread(output_path.parent.mkdir, parents=True, exist_ok=True)
 
-    async with httpx.AsyncClient(
-        follow_redirects=True,
-        timeout=httpx.Timeout(timeout),
-        headers={"User-Agent": USER_AGENT},
-    ) as client:
-        response = await client.get(url)
-        response.raise_for_status()
+    http_client = client if client is not None else get_client()
+    # 先寫入 .part 暫存檔，完整下載後才換名，中斷時不會留下截斷的 PDF
+    part_path = output_path.with_name(output_path.name + ".part")
+    written = 0
+
+    async def _fetch() -> None:
+        nonlocal written
+        written = 0
+        async with http_client.stream("GET", url, timeout=httpx.Timeout(timeout)) as response:
+            response.raise_for_status()
+
+            async with aiofiles.open(part_path, "wb") as f:
+                content_length = response.headers.get("content-length", "")
+                if content_length.isdigit() and int(content_length) < SMALL_DOWNLOAD_SIZE:
+                    # 小檔案一次讀完再寫入，省去逐塊迭代
+                    body = await response.aread()
+                    _warn_if_not_pdf(body, url)
+                    await f.write(body)
+                    written = len(body)
+                else:
+                    # 邊接收邊寫入，記憶體用量只保留一個區塊
+                    async for chunk in response.aiter_bytes(DOWNLOAD_CHUNK_SIZE):
+                        if written == 0:
+                            _warn_if_not_pdf(chunk, url)
+                        await f.write(chunk)
+                        written += len(chunk)
+
+    try:
+        # 重試時以 "wb" 重新開檔，會覆寫先前中斷的部分內容
+        await _with_retry(_fetch)
+        await _to_thread(os.replace, part_path, output_path)
+    except BaseException:
+        part_path.unlink(missing_ok=True)
+        raise
+
+    # 以寫入的位元組數記錄大小，不必再 stat 檔案
+    if logger.isEnabledFor(logging.INFO):
+        logger.info("下載完成: %s (%s bytes)", output_path, f"{written:,}")
 
-        # 檢查 Content-Type
-        content_type = response.headers.get("content-type", "")
-        if "pdf" not in content_type.lower() and not url.lower().endswith(".pdf"):
-            logger.warning(f"警告: Content-Type 不是 PDF ({content_type})，但仍嘗試儲存檔案")
+    return output_path
 
-        # 非同步寫入檔案
-        async with aiofiles.open(output_path, "wb") as f:
-            await f.write(response.content)
 
-        file_size = output_path.stat().st_size
-        logger.info(f"下載完成: {output_path} ({file_size:,} bytes)")
+async def download_papers(
+    jobs: list[tuple[str, Path]],
+    concurrency: int = 16,
+) -> list[Path | BaseException]:
+    """同時下載多篇論文 PDF，以 semaphore 限制同時進行的下載數量.
+
+    Args:
+        jobs: (下載網址, 儲存路徑) 的列表
+        concurrency: 最大同時下載數量
+
+    Returns:
+        與 jobs 順序相同的結果列表；成功為儲存路徑，失敗為對應的例外
+    """
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def _download_one(url: str, output_path: Path) -> Path:
+        async with semaphore:
+            return await download_paper(url, output_path)
 
-        return output_path
+    return await asyncio.gather(
+        *(_download_one(url, output_path) for url, output_path in jobs),
+        return_exceptions=True,
+    )
 
 
 async def search_paper(
     query: str,
     max_results: int = 5,
+    client: httpx.AsyncClient | None = None,
 ) -> list[dict[str, str]]:
     """搜尋學術論文（使用 Semantic Scholar API）.
 
+    相同查詢（忽略大小寫與多餘空白）在 SEARCH_CACHE_TTL 秒內直接回傳快取結果。
+
     Args:
         query: 搜尋關鍵字
         max_results: 最大結果數量
+        client: 使用的 HTTP 客戶端（可選，預設為共用客戶端）
 
     Returns:
         論文資訊列表，每個包含 title, authors, url, year 等
     """
-    api_url = "https://api.semanticscholar.org/graph/v1/paper/search"
+    key = (" ".join(query.lower().split()), max_results)
+    now = time.monotonic()
+    cached = _search_cache.get(key)
+    if cached is not None and now - cached[0] < SEARCH_CACHE_TTL:
+        _search_cache.move_to_end(key)
+        return [dict(paper) for paper in cached[1]]
+
+    results = await _fetch_search_results(query, max_results, client)
+    _search_cache[key] = (now, tuple(dict(paper) for paper in results))
+    _search_cache.move_to_end(key)
+    while len(_search_cache) > SEARCH_CACHE_SIZE:
+        _search_cache.popitem(last=False)
+    return results
 
+
+async def _fetch_search_results(
+    query: str,
+    max_results: int,
+    client: httpx.AsyncClient | None,
+) -> list[dict[str, str]]:
+    """向 Semantic Scholar API 查詢並整理結果（不經過快取）."""
     params: dict[str, str | int] = {
         "query": query,
         "limit": max_results,
-        "fields": "title,authors,year,venue,openAccessPdf",
+        "fields": _SEARCH_FIELDS,
     }
 
-    async with httpx.AsyncClient(
-        timeout=httpx.Timeout(30.0),
-        headers={"User-Agent": USER_AGENT},
-    ) as client:
-        response = await client.get(api_url, params=params)
+    http_client = client if client is not None else get_client()
+
+    async def _fetch() -> httpx.Response:
+        response = await http_client.get(_SEARCH_API_URL, params=params, timeout=_SEARCH_TIMEOUT)
         response.raise_for_status()
+        return response
+
+    response = await _with_retry(_fetch)
+
+    # orjson 直接解析位元組，省去 bytes→str 解碼與標準 json 的開銷
+    data: dict[str, Any] = orjson.loads(response.content)
+    papers: list[dict[str, Any]] = data.get("data", [])
+
+    results: list[dict[str, str]] = []
+    for paper in papers:
+        pdf_info: dict[str, str] = paper.get("openAccessPdf") or {}
+        authors: list[dict[str, str]] = paper.get("authors") or []
+        # 只取前三位作者，超過時加上 et al.
+        names = [a.get("name", "") for a in authors[:3]]
+        author_names = ", ".join(names) + (" et al." if len(authors) > 3 else "")
+
+        results.append(
+            {
+                "title": paper.get("title", "Unknown"),
+                "authors": author_names,
+                "year": str(paper.get("year", "")),
+                "venue": paper.get("venue", ""),
+                "pdf_url": pdf_info.get("url", ""),
+            }
+        )
 
-        data: dict[str, Any] = response.json()
-        papers: list[dict[str, Any]] = data.get("data", [])
-
-        results: list[dict[str, str]] = []
-        for paper in papers:
-            pdf_info: dict[str, str] = paper.get("openAccessPdf") or {}
-            authors: list[dict[str, str]] = paper.get("authors", [])
-            author_names = ", ".join(a.get("name", "") for a in authors[:3])
-            if len(authors) > 3:
-                author_names += " et al."
-
-            results.append(
-                {
-                    "title": paper.get("title", "Unknown"),
-                    "authors": author_names,
-                    "year": str(paper.get("year", "")),
-                    "venue": paper.get("venue", ""),
-                    "pdf_url": pdf_info.get("url", ""),
-                }
-            )
-
-        return results
+    return results
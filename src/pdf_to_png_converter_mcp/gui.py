@@ -5,8 +5,11 @@
 
 from __future__ import annotations
 
+import asyncio
+import os
 import subprocess
 import sys
+import time
 from pathlib import Path
 from typing import Any
 
@@ -34,12 +37,47 @@ _CREATION_FLAGS: int = 0
 if sys.platform == "win32":
     _CREATION_FLAGS = getattr(subprocess, "CREATE_NO_WINDOW", 0x08000000)
 
+# 所有 pdftoppm 呼叫共用的 subprocess 參數
+_SUBPROCESS_KWARGS: dict[str, Any] = {
+    "stdout": asyncio.subprocess.PIPE,
+    "stderr": asyncio.subprocess.PIPE,
+}
+if sys.platform == "win32":
+    _SUBPROCESS_KWARGS["creationflags"] = _CREATION_FLAGS
+
+# 背景執行緒送往 GUI 的日誌與進度節流設定
+_LOG_BATCH_SIZE = 32
+_SIGNAL_INTERVAL = 0.1  # 秒
+
+
+def _find_pdfs(root: str) -> list[Path]:
+    """遞迴搜尋資料夾中的 PDF，只為符合的檔案建立 Path."""
+    pdf_files: list[Path] = []
+    for dirpath, _dirnames, filenames in os.walk(root):
+        for name in filenames:
+            if name.lower().endswith(".pdf"):
+                pdf_files.append(Path(dirpath, name))
+    return pdf_files
+
+
+class ScanWorker(QThread):
+    """背景執行緒掃描資料夾中的 PDF，避免大型資料夾卡住介面."""
+
+    finished_signal = Signal(list)  # list[Path]
+
+    def __init__(self, folder: str) -> None:
+        super().__init__()
+        self.folder = folder
+
+    def run(self) -> None:
+        self.finished_signal.emit(_find_pdfs(self.folder))
+
 
 class ConvertWorker(QThread):
     """背景執行緒處理 PDF 轉換."""
 
     progress = Signal(int, int)  # current, total
-    log = Signal(str)
+    log_batch = Signal(list)  # list[str]
     finished_signal = Signal(bool, str)
 
     def __init__(self, pdf_files: list[Path], dpi: int = 1200) -> None:
@@ -47,68 +85,160 @@ class ConvertWorker(QThread):
         self.pdf_files = pdf_files
         self.dpi = dpi
         self.is_cancelled = False
+        # 每個檔案只有輸入與輸出路徑不同，其餘參數預先建立
+        self._cmd_prefix = ["pdftoppm", "-png", "-r", str(dpi)]
+        self._log_buffer: list[str] = []
+        self._last_log_flush = 0.0
+        self._last_progress = 0.0
+        self._pending_progress: tuple[int, int] | None = None
+        self._flush_handle: asyncio.TimerHandle | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._processes: set[asyncio.subprocess.Process] = set()
 
     def run(self) -> None:
         try:
             if not self.pdf_files:
-                self.finished_signal.emit(False, "找不到任何 PDF 檔案")
+                self._finish(False, "找不到任何 PDF 檔案")
                 return
 
             total = len(self.pdf_files)
-            self.log.emit(f"共 {total} 個 PDF 檔案待轉換")
+            self._log(f"共 {total} 個 PDF 檔案待轉換")
 
-            success_count = 0
-            for i, pdf_path in enumerate(self.pdf_files):
+            # 在此背景執行緒中執行自己的事件迴圈
+            success, message = asyncio.run(self._run_async())
+            self._finish(success, message)
+
+        except Exception as e:
+            self._finish(False, f"發生錯誤: {e!s}")
+
+    async def _run_async(self) -> tuple[bool, str]:
+        """同時執行多個 pdftoppm 行程，數量以 CPU 核心數為上限."""
+        self._loop = asyncio.get_running_loop()
+        total = len(self.pdf_files)
+        semaphore = asyncio.Semaphore(os.cpu_count() or 1)
+        done = 0
+        success_count = 0
+
+        async def _convert(pdf_path: Path) -> None:
+            nonlocal done, success_count
+            async with semaphore:
                 if self.is_cancelled:
-                    self.finished_signal.emit(False, "轉換已取消")
                     return
-
-                self.progress.emit(i + 1, total)
-                self.log.emit(f"正在轉換: {pdf_path.name}")
-
                 try:
-                    output_base = pdf_path.parent / pdf_path.stem
-
-                    cmd = [
-                        "pdftoppm",
-                        "-png",
-                        "-r",
-                        str(self.dpi),
-                        str(pdf_path),
-                        str(output_base),
-                    ]
-
-                    kwargs: dict[str, Any] = {
-                        "capture_output": True,
-                        "text": True,
-                    }
-                    if sys.platform == "win32":
-                        kwargs["creationflags"] = _CREATION_FLAGS
-
-                    result = subprocess.run(cmd, **kwargs)
-
-                    if result.returncode == 0:
-                        self.log.emit(f"✓ 成功: {pdf_path.name}")
-                        success_count += 1
-                    else:
-                        self.log.emit(f"✗ 失敗: {pdf_path.name}")
-                        if result.stderr:
-                            self.log.emit(f"  錯誤: {result.stderr.strip()}")
-
+                    returncode, stderr = await self._convert_one(pdf_path)
                 except FileNotFoundError:
-                    self.log.emit("✗ 錯誤: 找不到 pdftoppm，請確認已安裝 poppler-utils")
-                    self.finished_signal.emit(False, "找不到 pdftoppm 工具")
-                    return
+                    raise
                 except Exception as e:
-                    self.log.emit(f"✗ 錯誤: {e!s}")
+                    returncode, stderr = None, str(e)
 
-            self.finished_signal.emit(True, f"完成！成功轉換 {success_count}/{total} 個檔案")
+            if self.is_cancelled:
+                return
 
-        except Exception as e:
-            self.finished_signal.emit(False, f"發生錯誤: {e!s}")
+            done += 1
+            self._report_progress(done, total)
+            if returncode == 0:
+                self._log(f"✓ 成功: {pdf_path.name}")
+                success_count += 1
+            else:
+                self._log(f"✗ 失敗: {pdf_path.name}")
+                if stderr:
+                    self._log(f"  錯誤: {stderr.strip()}")
+
+        try:
+            await asyncio.gather(*(_convert(pdf_path) for pdf_path in self.pdf_files))
+        except FileNotFoundError:
+            self._terminate_processes()
+            self._log("✗ 錯誤: 找不到 pdftoppm，請確認已安裝 poppler-utils")
+            return False, "找不到 pdftoppm 工具"
+        finally:
+            if self._flush_handle is not None:
+                self._flush_handle.cancel()
+                self._flush_handle = None
+            self._loop = None
+
+        if self.is_cancelled:
+            return False, "轉換已取消"
+        return True, f"完成！成功轉換 {success_count}/{total} 個檔案"
+
+    async def _convert_one(self, pdf_path: Path) -> tuple[int | None, str]:
+        """以 pdftoppm 轉換單一 PDF，回傳 (returncode, stderr)."""
+        # 直接切掉字串副檔名，避免每個檔案重新組合 Path
+        str_pdf = os.fspath(pdf_path)
+        if str_pdf.lower().endswith(".pdf"):
+            str_base = str_pdf[:-4]
+        else:
+            str_base = os.fspath(pdf_path.with_suffix(""))
+        process = await asyncio.create_subprocess_exec(
+            *self._cmd_prefix, str_pdf, str_base, **_SUBPROCESS_KWARGS
+        )
+        self._processes.add(process)
+        try:
+            _, stderr = await process.communicate()
+        finally:
+            self._processes.discard(process)
+        return process.returncode, stderr.decode("utf-8", errors="replace")
+
+    def _terminate_processes(self) -> None:
+        """終止所有仍在執行的 pdftoppm 行程（需在事件迴圈執行緒中呼叫）."""
+        for process in self._processes:
+            if process.returncode is None:
+                process.terminate()
+
+    def _log(self, message: str) -> None:
+        """暫存日誌訊息，累積一定數量或時間後再一次送往 GUI."""
+        self._log_buffer.append(message)
+        if (
+            len(self._log_buffer) >= _LOG_BATCH_SIZE
+            or time.monotonic() - self._last_log_flush >= _SIGNAL_INTERVAL
+        ):
+            self._flush_log()
+        else:
+            self._schedule_flush()
+
+    def _flush_log(self) -> None:
+        if self._log_buffer:
+            self.log_batch.emit(self._log_buffer)
+            self._log_buffer = []
+        self._last_log_flush = time.monotonic()
+
+    def _report_progress(self, current: int, total: int) -> None:
+        """更新進度，最多每 _SIGNAL_INTERVAL 秒送出一次（最後一筆一定送出）."""
+        now = time.monotonic()
+        if current == total or now - self._last_progress >= _SIGNAL_INTERVAL:
+            self.progress.emit(current, total)
+            self._last_progress = now
+            self._pending_progress = None
+        else:
+            self._pending_progress = (current, total)
+            self._schedule_flush()
+
+    def _schedule_flush(self) -> None:
+        """安排一次延後送出，避免暫存的日誌與進度等到下一個事件才出現."""
+        if self._flush_handle is None and self._loop is not None:
+            self._flush_handle = self._loop.call_later(_SIGNAL_INTERVAL, self._flush_pending)
+
+    def _flush_pending(self) -> None:
+        """送出延後期間累積的日誌與最新進度."""
+        self._flush_handle = None
+        self._flush_log()
+        if self._pending_progress is not None:
+            self.progress.emit(*self._pending_progress)
+            self._last_progress = time.monotonic()
+            self._pending_progress = None
+
+    def _finish(self, success: bool, message: str) -> None:
+        self._flush_log()
+        self.finished_signal.emit(success, message)
 
     def cancel(self) -> None:
         self.is_cancelled = True
+        loop = self._loop
+        if loop is not None:
+            try:
+                loop.call_soon_threadsafe(self._terminate_processes)
+            except RuntimeError:
+                # 事件迴圈剛好已結束，沒有需要終止的行程
+                pass
 
 
 class PDFConverterWindow(QMainWindow):
@@ -117,7 +247,10 @@ class PDFConverterWindow(QMainWindow):
     def __init__(self) -> None:
         super().__init__()
         self.worker: ConvertWorker | None = None
+        self.scan_worker: ScanWorker | None = None
+        self._scanning = False
         self.selected_files: list[Path] = []
+        self._selected_set: set[Path] = set()
         self.init_ui()
 
     def init_ui(self) -> None:
@@ -248,11 +381,13 @@ class PDFConverterWindow(QMainWindow):
         for item in reversed(selected_items):
             row = self.file_list.row(item)
             self.file_list.takeItem(row)
-            del self.selected_files[row]
+            self._selected_set.discard(self.selected_files.pop(row))
         self.update_file_count()
 
     def browse_folder(self) -> None:
         """選擇資料夾並掃描所有 PDF."""
+        if self._scanning:
+            return
         folder = QFileDialog.getExistingDirectory(
             self,
             "選擇資料夾",
@@ -260,12 +395,34 @@ class PDFConverterWindow(QMainWindow):
             QFileDialog.ShowDirsOnly | QFileDialog.DontResolveSymlinks,
         )
         if folder:
-            pdf_files = list(Path(folder).rglob("*.pdf"))
-            if pdf_files:
-                self.add_files(pdf_files)
+            # 掃描期間鎖住會改動檔案列表或開始轉換的按鈕
+            self._scanning = True
+            self.browse_folder_btn.setEnabled(False)
+            self.browse_files_btn.setEnabled(False)
+            self.clear_btn.setEnabled(False)
+            self.start_btn.setEnabled(False)
+            self.progress_label.setText("正在掃描資料夾...")
+            self.scan_worker = ScanWorker(folder)
+            self.scan_worker.finished_signal.connect(self.folder_scanned)
+            self.scan_worker.start()
+
+    def folder_scanned(self, pdf_files: list[Path]) -> None:
+        """資料夾掃描完成後加入檔案."""
+        self._scanning = False
+        converting = self._is_converting()
+        if not converting:
+            self.browse_folder_btn.setEnabled(True)
+            self.browse_files_btn.setEnabled(True)
+            self.clear_btn.setEnabled(True)
+        if pdf_files:
+            self.add_files(pdf_files)
+            if not converting:
                 self.append_log(f"從資料夾掃描到 {len(pdf_files)} 個 PDF 檔案")
-            else:
-                QMessageBox.information(self, "提示", "該資料夾中沒有找到 PDF 檔案")
+        else:
+            self.update_file_count()
+            if not converting:
+                self.progress_label.setText("等待開始...")
+            QMessageBox.information(self, "提示", "該資料夾中沒有找到 PDF 檔案")
 
     def browse_files(self) -> None:
         """選擇多個 PDF 檔案."""
@@ -281,22 +438,30 @@ class PDFConverterWindow(QMainWindow):
 
     def add_files(self, pdf_files: list[Path]) -> None:
         """加入檔案到列表（避免重複）."""
-        added_count = 0
+        new_files: list[Path] = []
         for pdf_path in pdf_files:
-            if pdf_path not in self.selected_files:
-                self.selected_files.append(pdf_path)
-                self.file_list.addItem(str(pdf_path))
-                added_count += 1
+            if pdf_path not in self._selected_set:
+                self._selected_set.add(pdf_path)
+                new_files.append(pdf_path)
+
+        if new_files:
+            self.selected_files.extend(new_files)
+            # 一次加入所有項目，避免逐筆觸發重新排版
+            self.file_list.setUpdatesEnabled(False)
+            self.file_list.addItems([str(p) for p in new_files])
+            self.file_list.setUpdatesEnabled(True)
 
-        if added_count > 0:
             self.update_file_count()
-            self.log_text.clear()
-            self.progress_bar.setValue(0)
-            self.progress_label.setText("已選擇檔案，準備開始...")
+            # 轉換中不可清掉正在寫入的日誌與進度
+            if not self._is_converting():
+                self.log_text.clear()
+                self.progress_bar.setValue(0)
+                self.progress_label.setText("已選擇檔案，準備開始...")
 
     def clear_files(self) -> None:
         """清除所有已選擇的檔案."""
         self.selected_files.clear()
+        self._selected_set.clear()
         self.file_list.clear()
         self.update_file_count()
         self.progress_bar.setValue(0)
@@ -306,7 +471,11 @@ class PDFConverterWindow(QMainWindow):
         """更新檔案數量顯示."""
         count = len(self.selected_files)
         self.file_count_label.setText(f"已選擇 {count} 個檔案")
-        self.start_btn.setEnabled(count > 0)
+        self.start_btn.setEnabled(count > 0 and not self._scanning and not self._is_converting())
+
+    def _is_converting(self) -> bool:
+        """轉換執行緒是否仍在執行."""
+        return self.worker is not None and self.worker.isRunning()
 
     def start_conversion(self) -> None:
         if not self.selected_files:
@@ -325,7 +494,7 @@ class PDFConverterWindow(QMainWindow):
 
         self.worker = ConvertWorker(self.selected_files.copy(), self.dpi_spinbox.value())
         self.worker.progress.connect(self.update_progress)
-        self.worker.log.connect(self.append_log)
+        self.worker.log_batch.connect(self.append_log_batch)
         self.worker.finished_signal.connect(self.conversion_finished)
         self.worker.start()
 
@@ -344,11 +513,16 @@ class PDFConverterWindow(QMainWindow):
         scrollbar = self.log_text.verticalScrollBar()
         scrollbar.setValue(scrollbar.maximum())
 
+    def append_log_batch(self, messages: list[str]) -> None:
+        self.append_log("\n".join(messages))
+
     def conversion_finished(self, success: bool, message: str) -> None:
-        self.start_btn.setEnabled(True)
-        self.browse_folder_btn.setEnabled(True)
-        self.browse_files_btn.setEnabled(True)
-        self.clear_btn.setEnabled(True)
+        # 資料夾仍在掃描時，交由 folder_scanned 重新啟用
+        idle = not self._scanning
+        self.start_btn.setEnabled(idle)
+        self.browse_folder_btn.setEnabled(idle)
+        self.browse_files_btn.setEnabled(idle)
+        self.clear_btn.setEnabled(idle)
         self.cancel_btn.setEnabled(False)
         self.dpi_spinbox.setEnabled(True)
 
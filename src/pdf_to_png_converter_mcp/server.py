@@ -3,19 +3,24 @@
 from __future__ import annotations
 
 import asyncio
+import io
 import logging
+import os
 import re
 import sys
+from collections.abc import Awaitable, Callable, Iterator
 from pathlib import Path
 from typing import Any
 
 import httpx
+from jsonschema import ValidationError
+from jsonschema.validators import validator_for
 from mcp.server import Server
 from mcp.server.stdio import stdio_server
 from mcp.types import TextContent, Tool
 
 from .converter import convert_pdf_to_png
-from .downloader import download_paper, search_paper
+from .downloader import close_client, download_paper, get_client, search_paper
 
 # 設定 UTF-8 編碼
 if sys.platform == "win32":
@@ -35,12 +40,22 @@ logger = logging.getLogger("pdf-to-png-mcp")
 # 創建 MCP 服務器
 server = Server("pdf-to-png-converter")
 
+# 批次轉換時同時處理的檔案數上限；每個檔案本身已用多個行程平行渲染，
+# 因此檔案層級只開少量並行，並把 CPU 核心平分給各檔案
+BATCH_CONCURRENCY = 2
+
+# 檔案名稱中不合法的字元
+_INVALID_CHARS = frozenset('<>:"/\\|?*')
+_INVALID_CHARS_RE = re.compile(r'[<>:"/\\|?*]')
+
 
 def sanitize_filename(name: str) -> str:
     """清理檔案名稱，移除不合法字元."""
-    # 移除或替換不合法字元
-    invalid_chars = r'[<>:"/\\|?*]'
-    sanitized = re.sub(invalid_chars, "_", name)
+    # 移除或替換不合法字元（多數名稱不含不合法字元，先以集合檢查略過 regex）
+    if _INVALID_CHARS.isdisjoint(name):
+        sanitized = name
+    else:
+        sanitized = _INVALID_CHARS_RE.sub("_", name)
     # 移除前後空白和點
     sanitized = sanitized.strip(" .")
     # 限制長度
@@ -49,182 +64,187 @@ def sanitize_filename(name: str) -> str:
     return sanitized or "unnamed"
 
 
-@server.list_tools()
-async def list_tools() -> list[Tool]:
-    """列出所有可用的工具."""
-    return [
-        Tool(
-            name="convert_pdf_to_png",
-            description=(
-                "將 PDF 檔案轉換為高品質 PNG 圖片。"
-                "DPI 預設為 1200，除非使用者明確要求其他數值，否則不要傳入 dpi 參數。"
-                "輸出圖片會放在與 PDF 相同的目錄。"
-            ),
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "pdf_path": {
-                        "type": "string",
-                        "description": "PDF 檔案的完整路徑",
-                    },
-                    "dpi": {
-                        "type": "integer",
-                        "description": "輸出解析度（DPI），預設 1200。除非使用者明確指定，否則不要傳入此參數",
-                        "default": 1200,
-                        "minimum": 72,
-                        "maximum": 2400,
-                    },
-                    "output_dir": {
-                        "type": "string",
-                        "description": "輸出目錄（可選，預設與 PDF 同目錄）",
-                    },
+# 工具定義為靜態內容，只在匯入時建立一次
+_TOOLS: list[Tool] = [
+    Tool(
+        name="convert_pdf_to_png",
+        description=(
+            "將 PDF 檔案轉換為高品質 PNG 圖片。"
+            "DPI 預設為 1200，除非使用者明確要求其他數值，否則不要傳入 dpi 參數。"
+            "輸出圖片會放在與 PDF 相同的目錄。"
+        ),
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "pdf_path": {
+                    "type": "string",
+                    "description": "PDF 檔案的完整路徑",
+                },
+                "dpi": {
+                    "type": "integer",
+                    "description": "輸出解析度（DPI），預設 1200。除非使用者明確指定，否則不要傳入此參數",
+                    "default": 1200,
+                    "minimum": 72,
+                    "maximum": 2400,
+                },
+                "output_dir": {
+                    "type": "string",
+                    "description": "輸出目錄（可選，預設與 PDF 同目錄）",
                 },
-                "required": ["pdf_path"],
             },
-        ),
-        Tool(
-            name="download_paper",
-            description=("從網路下載學術論文 PDF。會根據期刊名稱和論文標題自動建立資料夾結構。"),
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "url": {
-                        "type": "string",
-                        "description": "論文 PDF 的下載網址",
-                    },
-                    "journal": {
-                        "type": "string",
-                        "description": "期刊名稱（用於建立資料夾）",
-                    },
-                    "title": {
-                        "type": "string",
-                        "description": "論文標題（用於命名檔案和資料夾）",
-                    },
-                    "base_dir": {
-                        "type": "string",
-                        "description": "基礎目錄（可選，預設為當前目錄）",
-                    },
+            "required": ["pdf_path"],
+        },
+    ),
+    Tool(
+        name="download_paper",
+        description=("從網路下載學術論文 PDF。會根據期刊名稱和論文標題自動建立資料夾結構。"),
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "url": {
+                    "type": "string",
+                    "description": "論文 PDF 的下載網址",
+                },
+                "journal": {
+                    "type": "string",
+                    "description": "期刊名稱（用於建立資料夾）",
+                },
+                "title": {
+                    "type": "string",
+                    "description": "論文標題（用於命名檔案和資料夾）",
+                },
+                "base_dir": {
+                    "type": "string",
+                    "description": "基礎目錄（可選，預設為當前目錄）",
                 },
-                "required": ["url", "journal", "title"],
             },
+            "required": ["url", "journal", "title"],
+        },
+    ),
+    Tool(
+        name="download_and_convert",
+        description=(
+            "下載學術論文 PDF 並自動轉換為高品質 PNG 圖片（預設 1200 DPI）。"
+            "會根據期刊名稱和論文標題自動建立資料夾結構，"
+            "並將 PDF 和 PNG 都放在該資料夾中。"
+            "除非使用者明確要求其他 DPI，否則不要傳入 dpi 參數。"
         ),
-        Tool(
-            name="download_and_convert",
-            description=(
-                "下載學術論文 PDF 並自動轉換為高品質 PNG 圖片（預設 1200 DPI）。"
-                "會根據期刊名稱和論文標題自動建立資料夾結構，"
-                "並將 PDF 和 PNG 都放在該資料夾中。"
-                "除非使用者明確要求其他 DPI，否則不要傳入 dpi 參數。"
-            ),
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "url": {
-                        "type": "string",
-                        "description": "論文 PDF 的下載網址",
-                    },
-                    "journal": {
-                        "type": "string",
-                        "description": "期刊名稱（用於建立資料夾）",
-                    },
-                    "title": {
-                        "type": "string",
-                        "description": "論文標題（用於命名檔案和資料夾）",
-                    },
-                    "base_dir": {
-                        "type": "string",
-                        "description": "基礎目錄（可選，預設為當前目錄）",
-                    },
-                    "dpi": {
-                        "type": "integer",
-                        "description": "輸出解析度（DPI），預設 1200。除非使用者明確指定，否則不要傳入此參數",
-                        "default": 1200,
-                        "minimum": 72,
-                        "maximum": 2400,
-                    },
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "url": {
+                    "type": "string",
+                    "description": "論文 PDF 的下載網址",
+                },
+                "journal": {
+                    "type": "string",
+                    "description": "期刊名稱（用於建立資料夾）",
+                },
+                "title": {
+                    "type": "string",
+                    "description": "論文標題（用於命名檔案和資料夾）",
+                },
+                "base_dir": {
+                    "type": "string",
+                    "description": "基礎目錄（可選，預設為當前目錄）",
+                },
+                "dpi": {
+                    "type": "integer",
+                    "description": "輸出解析度（DPI），預設 1200。除非使用者明確指定，否則不要傳入此參數",
+                    "default": 1200,
+                    "minimum": 72,
+                    "maximum": 2400,
                 },
-                "required": ["url", "journal", "title"],
             },
+            "required": ["url", "journal", "title"],
+        },
+    ),
+    Tool(
+        name="batch_convert_pdfs",
+        description=(
+            "批次轉換資料夾中的所有 PDF 檔案為高品質 PNG 圖片（預設 1200 DPI）。"
+            "支援遞迴搜尋子資料夾。除非使用者明確要求其他 DPI，否則不要傳入 dpi 參數。"
         ),
-        Tool(
-            name="batch_convert_pdfs",
-            description=(
-                "批次轉換資料夾中的所有 PDF 檔案為高品質 PNG 圖片（預設 1200 DPI）。"
-                "支援遞迴搜尋子資料夾。除非使用者明確要求其他 DPI，否則不要傳入 dpi 參數。"
-            ),
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "folder_path": {
-                        "type": "string",
-                        "description": "包含 PDF 檔案的資料夾路徑",
-                    },
-                    "dpi": {
-                        "type": "integer",
-                        "description": "輸出解析度（DPI），預設 1200。除非使用者明確指定，否則不要傳入此參數",
-                        "default": 1200,
-                        "minimum": 72,
-                        "maximum": 2400,
-                    },
-                    "recursive": {
-                        "type": "boolean",
-                        "description": "是否遞迴搜尋子資料夾，預設 True",
-                        "default": True,
-                    },
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "folder_path": {
+                    "type": "string",
+                    "description": "包含 PDF 檔案的資料夾路徑",
+                },
+                "dpi": {
+                    "type": "integer",
+                    "description": "輸出解析度（DPI），預設 1200。除非使用者明確指定，否則不要傳入此參數",
+                    "default": 1200,
+                    "minimum": 72,
+                    "maximum": 2400,
+                },
+                "recursive": {
+                    "type": "boolean",
+                    "description": "是否遞迴搜尋子資料夾，預設 True",
+                    "default": True,
                 },
-                "required": ["folder_path"],
             },
+            "required": ["folder_path"],
+        },
+    ),
+    Tool(
+        name="search_paper",
+        description=(
+            "搜尋學術論文（使用 Semantic Scholar API）。"
+            "根據關鍵字搜尋論文，返回標題、作者、年份、期刊和 PDF 連結。"
         ),
-        Tool(
-            name="search_paper",
-            description=(
-                "搜尋學術論文（使用 Semantic Scholar API）。"
-                "根據關鍵字搜尋論文，返回標題、作者、年份、期刊和 PDF 連結。"
-            ),
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "query": {
-                        "type": "string",
-                        "description": "搜尋關鍵字",
-                    },
-                    "max_results": {
-                        "type": "integer",
-                        "description": "最大結果數量，預設 5",
-                        "default": 5,
-                        "minimum": 1,
-                        "maximum": 20,
-                    },
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "query": {
+                    "type": "string",
+                    "description": "搜尋關鍵字",
+                },
+                "max_results": {
+                    "type": "integer",
+                    "description": "最大結果數量，預設 5",
+                    "default": 5,
+                    "minimum": 1,
+                    "maximum": 20,
                 },
-                "required": ["query"],
             },
-        ),
-    ]
+            "required": ["query"],
+        },
+    ),
+]
 
 
-@server.call_tool()
+@server.list_tools()
+async def list_tools() -> list[Tool]:
+    """列出所有可用的工具."""
+    return _TOOLS
+
+
+# 預先為每個工具建立 JSON Schema 驗證器，避免每次呼叫都重新檢查 schema
+_VALIDATORS = {tool.name: validator_for(tool.inputSchema)(tool.inputSchema) for tool in _TOOLS}
+
+
+@server.call_tool(validate_input=False)
 async def call_tool(name: str, arguments: dict[str, Any]) -> list[TextContent]:
     """執行指定的工具."""
-    logger.info(f"執行工具: {name}，參數: {arguments}")
+    logger.info("執行工具: %s，參數: %s", name, arguments)
+
+    handler = _HANDLERS.get(name)
+    if handler is None:
+        return [TextContent(type="text", text=f"未知的工具: {name}")]
 
     try:
-        if name == "convert_pdf_to_png":
-            result = await handle_convert_pdf(arguments)
-        elif name == "download_paper":
-            result = await handle_download_paper(arguments)
-        elif name == "download_and_convert":
-            result = await handle_download_and_convert(arguments)
-        elif name == "batch_convert_pdfs":
-            result = await handle_batch_convert(arguments)
-        elif name == "search_paper":
-            result = await handle_search_paper(arguments)
-        else:
-            result = f"未知的工具: {name}"
+        _VALIDATORS[name].validate(arguments)
+    except ValidationError as e:
+        return [TextContent(type="text", text=f"參數錯誤: {e.message}")]
 
+    try:
+        result = await handler(arguments)
         return [TextContent(type="text", text=result)]
 
     except Exception as e:
-        logger.exception(f"工具執行失敗: {name}")
+        logger.exception("工具執行失敗: %s", name)
         return [TextContent(type="text", text=f"錯誤: {e!s}")]
 
 
@@ -241,7 +261,8 @@ async def handle_convert_pdf(arguments: dict[str, Any]) -> str:
         return f"錯誤: 檔案不是 PDF: {pdf_path}"
 
     output_path = Path(output_dir) if output_dir else pdf_path.parent
-    output_path.mkdir(parents=True, exist_ok=True)
+    if not output_path.is_dir():
+        output_path.mkdir(parents=True, exist_ok=True)
 
     try:
         png_files = await convert_pdf_to_png(pdf_path, output_path, dpi)
@@ -254,19 +275,28 @@ async def handle_convert_pdf(arguments: dict[str, Any]) -> str:
         return f"轉換失敗: {e!s}"
 
 
+def _prepare_paper_paths(
+    base_dir: str | Path, journal: str, title: str
+) -> tuple[str, str, Path, Path]:
+    """清理期刊與標題名稱並組出 base_dir/journal/title/ 路徑.
+
+    目錄由 download_paper 在執行緒中建立，這裡不在事件迴圈上做檔案系統操作。
+
+    Returns:
+        (清理後的期刊名稱, 清理後的標題, 論文資料夾, PDF 儲存路徑)
+    """
+    journal = sanitize_filename(journal)
+    title = sanitize_filename(title)
+    paper_dir = Path(base_dir) / journal / title
+    return journal, title, paper_dir, paper_dir / f"{title}.pdf"
+
+
 async def handle_download_paper(arguments: dict[str, Any]) -> str:
     """處理論文下載請求."""
     url = arguments["url"]
-    journal = sanitize_filename(arguments["journal"])
-    title = sanitize_filename(arguments["title"])
-    base_dir = Path(arguments.get("base_dir", "."))
-
-    # 建立目錄結構: base_dir/journal/title/
-    paper_dir = base_dir / journal / title
-    paper_dir.mkdir(parents=True, exist_ok=True)
-
-    pdf_filename = f"{title}.pdf"
-    pdf_path = paper_dir / pdf_filename
+    journal, title, _, pdf_path = _prepare_paper_paths(
+        arguments.get("base_dir", "."), arguments["journal"], arguments["title"]
+    )
 
     try:
         await download_paper(url, pdf_path)
@@ -280,17 +310,10 @@ async def handle_download_paper(arguments: dict[str, Any]) -> str:
 async def handle_download_and_convert(arguments: dict[str, Any]) -> str:
     """處理下載並轉換請求."""
     url = arguments["url"]
-    journal = sanitize_filename(arguments["journal"])
-    title = sanitize_filename(arguments["title"])
-    base_dir = Path(arguments.get("base_dir", "."))
     dpi = arguments.get("dpi", 1200)
-
-    # 建立目錄結構
-    paper_dir = base_dir / journal / title
-    paper_dir.mkdir(parents=True, exist_ok=True)
-
-    pdf_filename = f"{title}.pdf"
-    pdf_path = paper_dir / pdf_filename
+    journal, title, paper_dir, pdf_path = _prepare_paper_paths(
+        arguments.get("base_dir", "."), arguments["journal"], arguments["title"]
+    )
 
     results = []
 
@@ -318,6 +341,48 @@ async def handle_download_and_convert(arguments: dict[str, Any]) -> str:
     )
 
 
+async def _notify_progress(progress: int, total: int, message: str) -> None:
+    """以 MCP 進度通知回報進度，讓客戶端在工具完成前就看到結果.
+
+    不在請求中或客戶端未提供 progressToken 時略過。
+    """
+    try:
+        ctx = server.request_context
+    except LookupError:
+        return
+    progress_token = ctx.meta.progressToken if ctx.meta is not None else None
+    if progress_token is None:
+        return
+    try:
+        await ctx.session.send_progress_notification(
+            progress_token,
+            progress,
+            total,
+            message,
+            related_request_id=str(ctx.request_id),
+        )
+    except Exception:
+        logger.debug("無法傳送進度通知", exc_info=True)
+
+
+def _iter_pdfs(root: Path, recursive: bool) -> Iterator[Path]:
+    """以 os.scandir 走訪資料夾，只為副檔名是 .pdf 的項目建立 Path."""
+    stack = [os.fspath(root)]
+    while stack:
+        directory = stack.pop()
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        if recursive:
+                            stack.append(entry.path)
+                    elif entry.name.lower().endswith(".pdf"):
+                        yield Path(entry.path)
+        except OSError:
+            # 無法讀取的子資料夾直接略過
+            continue
+
+
 async def handle_batch_convert(arguments: dict[str, Any]) -> str:
     """處理批次轉換請求."""
     folder_path = Path(arguments["folder_path"])
@@ -331,30 +396,56 @@ async def handle_batch_convert(arguments: dict[str, Any]) -> str:
         return f"錯誤: 路徑不是資料夾: {folder_path}"
 
     # 搜尋 PDF 檔案
-    if recursive:
-        pdf_files = list(folder_path.rglob("*.pdf"))
-    else:
-        pdf_files = list(folder_path.glob("*.pdf"))
+    pdf_files = list(_iter_pdfs(folder_path, recursive))
 
     if not pdf_files:
         return f"在 {folder_path} 中找不到任何 PDF 檔案"
 
-    results = []
+    # 檔案層級與頁面層級的平行度共用同一份 CPU 預算：
+    # 同時轉換 concurrency 個檔案，每個檔案最多使用 workers 個渲染行程
+    cpu_count = os.cpu_count() or 1
+    concurrency = max(1, min(BATCH_CONCURRENCY, cpu_count, len(pdf_files)))
+    workers = max(1, cpu_count // concurrency)
+    semaphore = asyncio.Semaphore(concurrency)
+    done = 0
+
+    async def _convert_one(pdf_path: Path) -> str:
+        nonlocal done
+        async with semaphore:
+            try:
+                png_files = await convert_pdf_to_png(
+                    pdf_path, pdf_path.parent, dpi, workers=workers
+                )
+            except Exception as e:
+                done += 1
+                await _notify_progress(done, len(pdf_files), f"✗ {pdf_path.name}: {e!s}")
+                raise
+        done += 1
+        line = f"✓ {pdf_path.name}: {len(png_files)} 個 PNG"
+        await _notify_progress(done, len(pdf_files), line)
+        return line
+
+    outcomes = await asyncio.gather(
+        *(_convert_one(pdf_path) for pdf_path in pdf_files), return_exceptions=True
+    )
+
+    # 直接寫入緩衝區，不另外保留每個檔案的結果列表
+    details = io.StringIO()
     success_count = 0
 
-    for pdf_path in pdf_files:
-        try:
-            png_files = await convert_pdf_to_png(pdf_path, pdf_path.parent, dpi)
-            results.append(f"✓ {pdf_path.name}: {len(png_files)} 個 PNG")
+    for pdf_path, outcome in zip(pdf_files, outcomes, strict=True):
+        details.write("\n")
+        if isinstance(outcome, BaseException):
+            details.write(f"✗ {pdf_path.name}: {outcome!s}")
+        else:
+            details.write(outcome)
             success_count += 1
-        except Exception as e:
-            results.append(f"✗ {pdf_path.name}: {e!s}")
 
     return (
         f"批次轉換完成\n"
         f"成功: {success_count}/{len(pdf_files)}\n"
         f"DPI: {dpi}\n"
-        f"詳細結果:\n" + "\n".join(results)
+        f"詳細結果:" + details.getvalue()
     )
 
 
@@ -369,32 +460,54 @@ async def handle_search_paper(arguments: dict[str, Any]) -> str:
         if not results:
             return f"找不到與 '{query}' 相關的論文"
 
-        lines = [f"搜尋 '{query}' 的結果（{len(results)} 篇）:\n"]
+        buf = io.StringIO()
+        buf.write(f"搜尋 '{query}' 的結果（{len(results)} 篇）:\n")
         for i, paper in enumerate(results, 1):
-            lines.append(f"{i}. {paper['title']}")
-            lines.append(f"   作者: {paper['authors']}")
+            buf.write(f"\n{i}. {paper['title']}")
+            buf.write(f"\n   作者: {paper['authors']}")
             if paper.get("year"):
-                lines.append(f"   年份: {paper['year']}")
+                buf.write(f"\n   年份: {paper['year']}")
             if paper.get("venue"):
-                lines.append(f"   期刊: {paper['venue']}")
+                buf.write(f"\n   期刊: {paper['venue']}")
             if paper.get("pdf_url"):
-                lines.append(f"   PDF: {paper['pdf_url']}")
-            lines.append("")
+                buf.write(f"\n   PDF: {paper['pdf_url']}")
+            buf.write("\n")
 
-        return "\n".join(lines)
+        return buf.getvalue()
     except Exception as e:
         return f"搜尋失敗: {e!s}"
 
 
+# 工具名稱對應的處理函數
+_HANDLERS: dict[str, Callable[[dict[str, Any]], Awaitable[str]]] = {
+    "convert_pdf_to_png": handle_convert_pdf,
+    "download_paper": handle_download_paper,
+    "download_and_convert": handle_download_and_convert,
+    "batch_convert_pdfs": handle_batch_convert,
+    "search_paper": handle_search_paper,
+}
+
+
 def main() -> None:
     """啟動 MCP 服務器."""
     logger.info("啟動 PDF to PNG MCP 服務器...")
 
     async def run_server() -> None:
-        async with stdio_server() as (read_stream, write_stream):
-            await server.run(read_stream, write_stream, server.create_initialization_options())
+        # 啟動時即建立共用 HTTP 客戶端，所有下載與搜尋重用同一個連線池
+        get_client()
+        try:
+            async with stdio_server() as (read_stream, write_stream):
+                await server.run(read_stream, write_stream, server.create_initialization_options())
+        finally:
+            await close_client()
 
-    asyncio.run(run_server())
+    # 有安裝 uvloop（僅 POSIX）時改用 libuv 事件迴圈，加速 stdio/HTTP/子行程的 I/O
+    try:
+        import uvloop
+    except ImportError:
+        asyncio.run(run_server())
+    else:
+        uvloop.run(run_server())
 
 
 if __name__ == "__main__":
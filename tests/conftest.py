@@ -4,9 +4,17 @@ from __future__ import annotations
 
 import os
 import sys
+from collections.abc import AsyncIterator, Mapping
 from pathlib import Path
+from types import MappingProxyType
+from unittest.mock import AsyncMock, MagicMock
 
+import httpx
 import pytest
+import pytest_asyncio
+from mcp.types import Tool
+
+from pdf_to_png_converter_mcp.server import list_tools
 
 # 確保 UTF-8 編碼
 os.environ["PYTHONIOENCODING"] = "utf-8"
@@ -46,3 +54,107 @@ def sample_pdf(temp_dir: Path, sample_pdf_content: bytes) -> Path:
     pdf_path = temp_dir / "測試文件.pdf"  # 使用中文檔名測試 UTF-8
     pdf_path.write_bytes(sample_pdf_content)
     return pdf_path
+
+
+@pytest.fixture
+def mock_async_client_cls(monkeypatch: pytest.MonkeyPatch) -> MagicMock:
+    """以 MagicMock 取代 downloader 使用的 httpx.AsyncClient 類別."""
+    mock_cls = MagicMock()
+    monkeypatch.setattr("pdf_to_png_converter_mcp.downloader.httpx.AsyncClient", mock_cls)
+    return mock_cls
+
+
+@pytest.fixture
+def mock_async_client(mock_async_client_cls: MagicMock) -> MagicMock:
+    """提供共用 AsyncClient 的模擬實例（get_client() 會回傳此物件）."""
+    return mock_async_client_cls.return_value
+
+
+@pytest.fixture
+def mock_aiofiles(monkeypatch: pytest.MonkeyPatch) -> AsyncMock:
+    """以模擬物件取代 aiofiles.open，並回傳寫入用的檔案物件."""
+    mock_file = AsyncMock()
+    handle = MagicMock()
+    handle.__aenter__ = AsyncMock(return_value=mock_file)
+    handle.__aexit__ = AsyncMock(return_value=False)
+
+    def _open(path: Path, *args: object, **kwargs: object) -> MagicMock:
+        # 與真正以 "wb" 開檔相同，先建立空檔，讓後續的換名有檔案可用
+        Path(path).touch()
+        return handle
+
+    mock_open = MagicMock(side_effect=_open)
+    monkeypatch.setattr("pdf_to_png_converter_mcp.downloader.aiofiles.open", mock_open)
+    return mock_file
+
+
+@pytest_asyncio.fixture(scope="session")
+async def tools() -> list[Tool]:
+    """提供 list_tools() 的結果；工具列表是靜態的，整個測試階段只取一次."""
+    return await list_tools()
+
+
+@pytest.fixture(scope="session")
+def tool_names(tools: list[Tool]) -> frozenset[str]:
+    """所有工具名稱的集合."""
+    return frozenset(tool.name for tool in tools)
+
+
+@pytest.fixture(scope="session")
+def tools_by_name(tools: list[Tool]) -> Mapping[str, Tool]:
+    """以工具名稱索引的唯讀工具字典（整個測試階段共用）."""
+    return MappingProxyType({tool.name: tool for tool in tools})
+
+
+@pytest.fixture
+def mock_convert(monkeypatch: pytest.MonkeyPatch) -> AsyncMock:
+    """以 AsyncMock 取代 server 使用的 convert_pdf_to_png."""
+    mock = AsyncMock()
+    monkeypatch.setattr("pdf_to_png_converter_mcp.server.convert_pdf_to_png", mock)
+    return mock
+
+
+@pytest.fixture
+def mock_download(monkeypatch: pytest.MonkeyPatch) -> AsyncMock:
+    """以 AsyncMock 取代 server 使用的 download_paper."""
+    mock = AsyncMock()
+    monkeypatch.setattr("pdf_to_png_converter_mcp.server.download_paper", mock)
+    return mock
+
+
+@pytest.fixture
+def mock_search(monkeypatch: pytest.MonkeyPatch) -> AsyncMock:
+    """以 AsyncMock 取代 server 使用的 search_paper."""
+    mock = AsyncMock()
+    monkeypatch.setattr("pdf_to_png_converter_mcp.server.search_paper", mock)
+    return mock
+
+
+@pytest.fixture
+def mock_notify(monkeypatch: pytest.MonkeyPatch) -> AsyncMock:
+    """以 AsyncMock 取代 server 的進度通知."""
+    mock = AsyncMock()
+    monkeypatch.setattr("pdf_to_png_converter_mcp.server._notify_progress", mock)
+    return mock
+
+
+@pytest.fixture(scope="session")
+def pdf_transport() -> httpx.MockTransport:
+    """記憶體內的 HTTP 傳輸層：路徑以 missing.pdf 結尾回應 404，其餘回應假 PDF."""
+
+    def _handle(request: httpx.Request) -> httpx.Response:
+        if request.url.path.endswith("missing.pdf"):
+            return httpx.Response(404)
+        return httpx.Response(200, content=b"%PDF-1.4 fake")
+
+    return httpx.MockTransport(_handle)
+
+
+@pytest_asyncio.fixture
+async def transport_client(
+    pdf_transport: httpx.MockTransport, monkeypatch: pytest.MonkeyPatch
+) -> AsyncIterator[httpx.AsyncClient]:
+    """讓 downloader 的共用客戶端改走 pdf_transport，真正的下載流程不會連上網路."""
+    async with httpx.AsyncClient(transport=pdf_transport) as client:
+        monkeypatch.setattr("pdf_to_png_converter_mcp.downloader._client", client)
+        yield client
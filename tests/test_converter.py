@@ -11,7 +11,8 @@ import pytest
 from pdf_to_png_converter_mcp.converter import (
     _convert_with_pdf2image,
     _convert_with_pdftoppm,
-    _save_image,
+    _get_page_count,
+    _split_page_ranges,
     convert_pdf_to_png,
 )
 
@@ -100,6 +101,27 @@ class TestConvertPdfToPng:
         assert result == fallback_paths
         mock_pdftoppm.assert_awaited_once()
 
+    def test_skips_pdf2image_when_unavailable(self, sample_pdf: Path, temp_dir: Path) -> None:
+        """Goes straight to pdftoppm when pdf2image could not be imported."""
+        fallback_paths = [temp_dir / "測試文件-01.png"]
+
+        with (
+            patch("pdf_to_png_converter_mcp.converter._convert_from_path", None),
+            patch(
+                "pdf_to_png_converter_mcp.converter._convert_with_pdf2image",
+                new_callable=AsyncMock,
+            ) as mock_pdf2image,
+            patch(
+                "pdf_to_png_converter_mcp.converter._convert_with_pdftoppm",
+                new_callable=AsyncMock,
+                return_value=fallback_paths,
+            ),
+        ):
+            result = asyncio.run(convert_pdf_to_png(sample_pdf, temp_dir))
+
+        assert result == fallback_paths
+        mock_pdf2image.assert_not_awaited()
+
     def test_default_dpi(self, sample_pdf: Path, temp_dir: Path) -> None:
         """Default DPI value of 1200 is passed to the converter."""
         with patch(
@@ -109,7 +131,7 @@ class TestConvertPdfToPng:
         ) as mock_pdf2image:
             asyncio.run(convert_pdf_to_png(sample_pdf, temp_dir))
 
-        mock_pdf2image.assert_awaited_once_with(sample_pdf, temp_dir, 1200)
+        mock_pdf2image.assert_awaited_once_with(sample_pdf, temp_dir, 1200, None)
 
     def test_custom_dpi(self, sample_pdf: Path, temp_dir: Path) -> None:
         """Custom DPI value is forwarded to the converter."""
@@ -120,53 +142,38 @@ class TestConvertPdfToPng:
         ) as mock_pdf2image:
             asyncio.run(convert_pdf_to_png(sample_pdf, temp_dir, dpi=300))
 
-        mock_pdf2image.assert_awaited_once_with(sample_pdf, temp_dir, 300)
-
-
-class TestSaveImage:
-    """Tests for the _save_image helper function."""
-
-    def test_save_image(self, temp_dir: Path) -> None:
-        """Image.save is called with the string path and PNG format."""
-        mock_image = MagicMock()
-        output_path = temp_dir / "output.png"
-
-        _save_image(mock_image, output_path)
-
-        mock_image.save.assert_called_once_with(str(output_path), "PNG")
-
-    def test_save_image_unicode_path(self, temp_dir: Path) -> None:
-        """Image.save works with Unicode (Chinese) file paths."""
-        mock_image = MagicMock()
-        output_path = temp_dir / "測試圖片-001.png"
-
-        _save_image(mock_image, output_path)
-
-        mock_image.save.assert_called_once_with(str(output_path), "PNG")
+        mock_pdf2image.assert_awaited_once_with(sample_pdf, temp_dir, 300, None)
 
 
 class TestConvertWithPdf2image:
     """Tests for _convert_with_pdf2image."""
 
     @staticmethod
-    def _patch_pdf2image(mock_convert_from_path: MagicMock):
-        """Create a mock pdf2image module and inject it into sys.modules.
+    def _patch_pdf2image(mock_convert_from_path: MagicMock | None):
+        """Replace the convert_from_path imported by the converter at module load."""
+        return patch(
+            "pdf_to_png_converter_mcp.converter._convert_from_path",
+            mock_convert_from_path,
+        )
+
+    @staticmethod
+    def _fake_convert_from_path(page_count: int) -> MagicMock:
+        """Mimic ``convert_from_path(paths_only=True)`` writing uuid-named PNGs."""
 
-        The function under test does ``from pdf2image import convert_from_path``
-        inside its body. We need a fake ``pdf2image`` module in sys.modules so
-        that import resolves to our mock.
-        """
-        import types
+        def _convert(pdf_path: str, **kwargs: object) -> list[str]:
+            output_folder = Path(str(kwargs["output_folder"]))
+            paths = []
+            for i in range(1, page_count + 1):
+                path = output_folder / f"0b5c7e2a-{i:02d}.png"
+                path.write_bytes(b"fake png")
+                paths.append(str(path))
+            return paths
 
-        fake_module = types.ModuleType("pdf2image")
-        fake_module.convert_from_path = mock_convert_from_path  # type: ignore[attr-defined]
-        return patch.dict("sys.modules", {"pdf2image": fake_module})
+        return MagicMock(side_effect=_convert)
 
     def test_success(self, sample_pdf: Path, temp_dir: Path) -> None:
         """Returns correct output paths when convert_from_path succeeds."""
-        mock_img1 = MagicMock()
-        mock_img2 = MagicMock()
-        mock_cfp = MagicMock(return_value=[mock_img1, mock_img2])
+        mock_cfp = self._fake_convert_from_path(2)
 
         with self._patch_pdf2image(mock_cfp):
             result = asyncio.run(_convert_with_pdf2image(sample_pdf, temp_dir, 1200))
@@ -174,14 +181,14 @@ class TestConvertWithPdf2image:
         assert len(result) == 2
         assert result[0] == temp_dir / "測試文件-001.png"
         assert result[1] == temp_dir / "測試文件-002.png"
+        assert all(path.exists() for path in result)
 
     def test_output_file_naming(self, temp_dir: Path) -> None:
         """Output files are named {stem}-{NNN}.png with zero-padded indices."""
         pdf_path = temp_dir / "my-document.pdf"
         pdf_path.write_bytes(b"%PDF-1.4 minimal")
 
-        mock_images = [MagicMock() for _ in range(3)]
-        mock_cfp = MagicMock(return_value=mock_images)
+        mock_cfp = self._fake_convert_from_path(3)
 
         with self._patch_pdf2image(mock_cfp):
             result = asyncio.run(_convert_with_pdf2image(pdf_path, temp_dir, 300))
@@ -191,26 +198,43 @@ class TestConvertWithPdf2image:
         assert result[1].name == "my-document-002.png"
         assert result[2].name == "my-document-003.png"
 
-    def test_calls_save_image_for_each_page(self, sample_pdf: Path, temp_dir: Path) -> None:
-        """_save_image is called once per page image."""
-        mock_images = [MagicMock() for _ in range(2)]
-        mock_cfp = MagicMock(return_value=mock_images)
+    def test_renders_in_parallel_to_disk(self, sample_pdf: Path, temp_dir: Path) -> None:
+        """pdftoppm writes PNGs directly with multiple workers instead of returning images."""
+        mock_cfp = self._fake_convert_from_path(1)
+
+        with self._patch_pdf2image(mock_cfp):
+            asyncio.run(_convert_with_pdf2image(sample_pdf, temp_dir, 1200))
+
+        kwargs = mock_cfp.call_args.kwargs
+        assert kwargs["dpi"] == 1200
+        assert kwargs["fmt"] == "png"
+        assert kwargs["paths_only"] is True
+        assert kwargs["thread_count"] >= 1
+
+    def test_workers_caps_thread_count(self, sample_pdf: Path, temp_dir: Path) -> None:
+        """An explicit worker budget limits pdf2image's thread_count."""
+        mock_cfp = self._fake_convert_from_path(1)
 
         with (
             self._patch_pdf2image(mock_cfp),
-            patch(
-                "pdf_to_png_converter_mcp.converter._save_image",
-            ) as mock_save,
+            patch("pdf_to_png_converter_mcp.converter.os.cpu_count", return_value=16),
         ):
+            asyncio.run(_convert_with_pdf2image(sample_pdf, temp_dir, 1200, workers=4))
+
+        assert mock_cfp.call_args.kwargs["thread_count"] == 3
+
+    def test_temp_dir_removed(self, sample_pdf: Path, temp_dir: Path) -> None:
+        """The intermediate render directory is cleaned up after renaming."""
+        mock_cfp = self._fake_convert_from_path(2)
+
+        with self._patch_pdf2image(mock_cfp):
             asyncio.run(_convert_with_pdf2image(sample_pdf, temp_dir, 1200))
 
-        assert mock_save.call_count == 2
+        assert not [p for p in temp_dir.iterdir() if p.is_dir()]
 
     def test_import_error_propagates(self, sample_pdf: Path, temp_dir: Path) -> None:
-        """ImportError from pdf2image import propagates to caller."""
-        # Setting sys.modules["pdf2image"] = None causes ``from pdf2image import ...``
-        # to raise ImportError, simulating the package not being installed.
-        with patch.dict("sys.modules", {"pdf2image": None}), pytest.raises(ImportError):
+        """ImportError is raised when pdf2image was not importable at module load."""
+        with self._patch_pdf2image(None), pytest.raises(ImportError):
             asyncio.run(_convert_with_pdf2image(sample_pdf, temp_dir, 1200))
 
 
@@ -337,6 +361,115 @@ class TestConvertWithPdftoppm:
         names = [p.name for p in result]
         assert names == sorted(names)
 
+    def test_ignores_other_documents_output(self, sample_pdf: Path, temp_dir: Path) -> None:
+        """PNGs of another PDF whose stem merely starts with this stem are not returned."""
+        output_base = temp_dir / sample_pdf.stem
+        mock_proc = self._make_mock_process(returncode=0)
+
+        own = temp_dir / f"{sample_pdf.stem}-1.png"
+        own.write_bytes(b"fake png")
+        (temp_dir / f"{sample_pdf.stem}2-1.png").write_bytes(b"other png")
+        # Output of "{stem}-2.pdf" shares the "{stem}-" prefix
+        (temp_dir / f"{sample_pdf.stem}-2-1.png").write_bytes(b"other png")
+        (temp_dir / f"{sample_pdf.stem}-2-2.png").write_bytes(b"other png")
+        (temp_dir / f"{sample_pdf.stem}-notes.txt").write_text("x", encoding="utf-8")
+
+        with patch("asyncio.create_subprocess_exec", return_value=mock_proc):
+            result = asyncio.run(_convert_with_pdftoppm(sample_pdf, output_base, 1200))
+
+        assert result == [own]
+
+
+class TestPdftoppmSharding:
+    """Tests for splitting a pdftoppm conversion across page ranges."""
+
+    @staticmethod
+    def _make_mock_process(returncode: int = 0, stdout: bytes = b"") -> AsyncMock:
+        mock_proc = AsyncMock()
+        mock_proc.communicate = AsyncMock(return_value=(stdout, b""))
+        mock_proc.returncode = returncode
+        return mock_proc
+
+    def test_split_page_ranges(self) -> None:
+        """Pages are split into contiguous ranges covering every page once."""
+        assert _split_page_ranges(10, 3) == [(1, 4), (5, 7), (8, 10)]
+        assert _split_page_ranges(2, 2) == [(1, 1), (2, 2)]
+        assert _split_page_ranges(5, 1) == [(1, 5)]
+
+    def test_get_page_count(self, sample_pdf: Path) -> None:
+        """The page count is parsed from pdfinfo output."""
+        mock_proc = self._make_mock_process(stdout=b"Title:  x\nPages:          12\n")
+
+        with patch("asyncio.create_subprocess_exec", return_value=mock_proc) as mock_exec:
+            result = asyncio.run(_get_page_count(sample_pdf))
+
+        assert result == 12
+        assert mock_exec.call_args.args[:2] == ("pdfinfo", str(sample_pdf))
+
+    def test_get_page_count_without_pdfinfo(self, sample_pdf: Path) -> None:
+        """A missing pdfinfo binary yields None instead of raising."""
+        with patch("asyncio.create_subprocess_exec", side_effect=FileNotFoundError):
+            assert asyncio.run(_get_page_count(sample_pdf)) is None
+
+    def test_shards_across_cpus(self, sample_pdf: Path, temp_dir: Path) -> None:
+        """A multi-page PDF is rendered by one pdftoppm per page range."""
+        output_base = temp_dir / sample_pdf.stem
+        for i in range(1, 5):
+            (temp_dir / f"{sample_pdf.stem}-{i}.png").write_bytes(b"fake png")
+
+        pdfinfo_proc = self._make_mock_process(stdout=b"Pages: 4\n")
+        pdftoppm_proc = self._make_mock_process()
+
+        def _exec(*args: str, **kwargs: object) -> AsyncMock:
+            return pdfinfo_proc if args[0] == "pdfinfo" else pdftoppm_proc
+
+        with (
+            patch("asyncio.create_subprocess_exec", side_effect=_exec) as mock_exec,
+            patch("pdf_to_png_converter_mcp.converter.os.cpu_count", return_value=2),
+        ):
+            result = asyncio.run(_convert_with_pdftoppm(sample_pdf, output_base, 300))
+
+        pdftoppm_calls = [c.args for c in mock_exec.call_args_list if c.args[0] == "pdftoppm"]
+        assert len(pdftoppm_calls) == 2
+        assert pdftoppm_calls[0][4:8] == ("-f", "1", "-l", "2")
+        assert pdftoppm_calls[1][4:8] == ("-f", "3", "-l", "4")
+        assert len(result) == 4
+
+    def test_workers_caps_shards(self, sample_pdf: Path, temp_dir: Path) -> None:
+        """An explicit worker budget caps the shard count below the CPU count."""
+        output_base = temp_dir / sample_pdf.stem
+        for i in range(1, 9):
+            (temp_dir / f"{sample_pdf.stem}-{i}.png").write_bytes(b"fake png")
+
+        pdfinfo_proc = self._make_mock_process(stdout=b"Pages: 8\n")
+        pdftoppm_proc = self._make_mock_process()
+
+        def _exec(*args: str, **kwargs: object) -> AsyncMock:
+            return pdfinfo_proc if args[0] == "pdfinfo" else pdftoppm_proc
+
+        with (
+            patch("asyncio.create_subprocess_exec", side_effect=_exec) as mock_exec,
+            patch("pdf_to_png_converter_mcp.converter.os.cpu_count", return_value=8),
+        ):
+            asyncio.run(_convert_with_pdftoppm(sample_pdf, output_base, 300, workers=2))
+
+        pdftoppm_calls = [c.args for c in mock_exec.call_args_list if c.args[0] == "pdftoppm"]
+        assert len(pdftoppm_calls) == 2
+
+    def test_single_worker_skips_pdfinfo(self, sample_pdf: Path, temp_dir: Path) -> None:
+        """With a budget of one worker, no pdfinfo process is spawned and one pdftoppm runs."""
+        output_base = temp_dir / sample_pdf.stem
+        (temp_dir / f"{sample_pdf.stem}-1.png").write_bytes(b"fake png")
+
+        with patch(
+            "asyncio.create_subprocess_exec", return_value=self._make_mock_process()
+        ) as mock_exec:
+            asyncio.run(_convert_with_pdftoppm(sample_pdf, output_base, 300, workers=1))
+
+        programs = [c.args[0] for c in mock_exec.call_args_list]
+        assert programs == ["pdftoppm"]
+        assert "-f" not in mock_exec.call_args.args
+
 
 class TestConverterIntegration:
     """Integration tests (require poppler)."""
@@ -2,59 +2,100 @@
 
 from __future__ import annotations
 
+import asyncio
 import logging
+from collections import OrderedDict
+from collections.abc import AsyncIterator
+from dataclasses import dataclass, field
 from pathlib import Path
 from unittest.mock import AsyncMock, MagicMock, patch
 
 import httpx
+import orjson
 import pytest
 
-from pdf_to_png_converter_mcp.downloader import download_paper, search_paper
+from pdf_to_png_converter_mcp import downloader
+from pdf_to_png_converter_mcp.downloader import (
+    DOWNLOAD_CHUNK_SIZE,
+    MAX_ATTEMPTS,
+    SEARCH_CACHE_TTL,
+    close_client,
+    download_paper,
+    download_papers,
+    get_client,
+    search_paper,
+)
+
+
+@pytest.fixture(autouse=True)
+def _reset_shared_client(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Each test starts without a cached shared client or cached search results."""
+    monkeypatch.setattr(downloader, "_client", None)
+    monkeypatch.setattr(downloader, "_search_cache", OrderedDict())
+
+
+@pytest.fixture
+def retry_sleep(monkeypatch: pytest.MonkeyPatch) -> AsyncMock:
+    """Replace the backoff sleep so retry tests run instantly and can inspect delays."""
+    sleep = AsyncMock()
+    monkeypatch.setattr(downloader, "_sleep", sleep)
+    return sleep
+
 
 # ---------------------------------------------------------------------------
 # Helper: build a mock httpx response
 # ---------------------------------------------------------------------------
 
 
+@dataclass
+class FakeResponse:
+    """Lightweight stand-in for httpx.Response with only what the downloader uses."""
+
+    status_code: int = 200
+    content: bytes = b"%PDF-1.4 fake content"
+    headers: dict[str, str] = field(default_factory=dict)
+    error: Exception | None = None
+    raise_for_status_calls: int = 0
+
+    def raise_for_status(self) -> None:
+        self.raise_for_status_calls += 1
+        if self.error is not None:
+            raise self.error
+
+    async def aread(self) -> bytes:
+        return self.content
+
+    async def aiter_bytes(self, chunk_size: int | None = None) -> AsyncIterator[bytes]:
+        step = chunk_size or len(self.content) or 1
+        for start in range(0, len(self.content), step):
+            yield self.content[start : start + step]
+
+
 def _make_mock_response(
     status_code: int = 200,
     content: bytes = b"%PDF-1.4 fake content",
     content_type: str = "application/pdf",
     json_data: dict | None = None,
     raise_for_status_side_effect: Exception | None = None,
-) -> MagicMock:
-    """Create a reusable mock httpx.Response."""
-    resp = MagicMock()
-    resp.status_code = status_code
-    resp.headers = {"content-type": content_type}
-    resp.content = content
-    if json_data is not None:
-        resp.json = MagicMock(return_value=json_data)
-    if raise_for_status_side_effect:
-        resp.raise_for_status = MagicMock(side_effect=raise_for_status_side_effect)
-    else:
-        resp.raise_for_status = MagicMock()
-    return resp
-
-
-def _patch_httpx_client(mock_client_cls: MagicMock, mock_response: MagicMock) -> AsyncMock:
-    """Wire up the AsyncClient context-manager mock and return the inner client."""
-    mock_client = AsyncMock()
+) -> FakeResponse:
+    """Create a fake httpx.Response."""
+    return FakeResponse(
+        status_code=status_code,
+        content=orjson.dumps(json_data) if json_data is not None else content,
+        headers={"content-type": content_type},
+        error=raise_for_status_side_effect,
+    )
+
+
+def _patch_httpx_client(mock_client: MagicMock, mock_response: FakeResponse) -> MagicMock:
+    """Wire up the AsyncClient mock to return ``mock_response`` and hand it back."""
     mock_client.get = AsyncMock(return_value=mock_response)
-    mock_client_cls.return_value.__aenter__ = AsyncMock(return_value=mock_client)
-    mock_client_cls.return_value.__aexit__ = AsyncMock(return_value=False)
+    mock_client.stream = MagicMock()
+    mock_client.stream.return_value.__aenter__ = AsyncMock(return_value=mock_response)
+    mock_client.stream.return_value.__aexit__ = AsyncMock(return_value=False)
     return mock_client
 
 
-def _patch_aiofiles(mock_aiofiles_open: MagicMock) -> AsyncMock:
-    """Wire up aiofiles.open as an async context-manager and return the file mock."""
-    mock_file = AsyncMock()
-    mock_file.write = AsyncMock()
-    mock_aiofiles_open.return_value.__aenter__ = AsyncMock(return_value=mock_file)
-    mock_aiofiles_open.return_value.__aexit__ = AsyncMock(return_value=False)
-    return mock_file
-
-
 # ===========================================================================
 # TestDownloadPaper
 # ===========================================================================
@@ -63,75 +104,196 @@ def _patch_aiofiles(mock_aiofiles_open: MagicMock) -> AsyncMock:
 class TestDownloadPaper:
     """Tests for the download_paper async function."""
 
-    @patch("pdf_to_png_converter_mcp.downloader.aiofiles.open")
-    @patch("pdf_to_png_converter_mcp.downloader.httpx.AsyncClient")
     async def test_success(
         self,
-        mock_client_cls: MagicMock,
-        mock_aiofiles_open: MagicMock,
+        mock_async_client: MagicMock,
+        mock_aiofiles: AsyncMock,
         tmp_path: Path,
     ) -> None:
         """Successful download writes content and returns the output path."""
         pdf_bytes = b"%PDF-1.4 test content"
         mock_response = _make_mock_response(content=pdf_bytes)
-        _patch_httpx_client(mock_client_cls, mock_response)
-        mock_file = _patch_aiofiles(mock_aiofiles_open)
+        _patch_httpx_client(mock_async_client, mock_response)
 
         output = tmp_path / "journal" / "paper.pdf"
-        # Create the file so that output_path.stat() succeeds inside download_paper
-        output.parent.mkdir(parents=True, exist_ok=True)
-        output.write_bytes(pdf_bytes)
 
         result = await download_paper("https://example.com/paper.pdf", output)
 
         assert result == output
-        mock_response.raise_for_status.assert_called_once()
-        mock_file.write.assert_awaited_once_with(pdf_bytes)
+        assert mock_response.raise_for_status_calls == 1
+        mock_aiofiles.write.assert_awaited_once_with(pdf_bytes)
+
+    @pytest.mark.usefixtures("mock_aiofiles")
+    async def test_logs_size_from_bytes_written(
+        self,
+        mock_async_client: MagicMock,
+        tmp_path: Path,
+        caplog: pytest.LogCaptureFixture,
+    ) -> None:
+        """The completion log reports the streamed byte count without touching the file."""
+        mock_response = _make_mock_response(content=b"x" * 1234)
+        _patch_httpx_client(mock_async_client, mock_response)
+
+        output = tmp_path / "never-written.pdf"
+        with caplog.at_level(logging.INFO, logger="pdf-to-png-mcp.downloader"):
+            await download_paper("https://example.com/paper.pdf", output)
+
+        # The mocked writes never reach disk, so a stat() would have reported 0 bytes
+        assert output.stat().st_size == 0
+        assert any("1,234 bytes" in record.getMessage() for record in caplog.records)
+
+    async def test_streams_in_chunks(
+        self,
+        mock_async_client: MagicMock,
+        mock_aiofiles: AsyncMock,
+        tmp_path: Path,
+    ) -> None:
+        """The body is written chunk by chunk as it arrives instead of buffered whole."""
+        chunks = [b"%PDF-1.4 ", b"part two ", b"part three"]
+        mock_response = _make_mock_response()
+
+        async def _aiter_bytes(chunk_size: int | None = None) -> AsyncIterator[bytes]:
+            assert chunk_size == DOWNLOAD_CHUNK_SIZE
+            for chunk in chunks:
+                yield chunk
+
+        mock_response.aiter_bytes = _aiter_bytes
+        mock_client = _patch_httpx_client(mock_async_client, mock_response)
+
+        output = tmp_path / "paper.pdf"
+
+        await download_paper("https://example.com/paper.pdf", output)
+
+        mock_client.stream.assert_called_once()
+        assert mock_client.stream.call_args.args == ("GET", "https://example.com/paper.pdf")
+        mock_client.get.assert_not_called()
+        assert [c.args[0] for c in mock_aiofiles.write.await_args_list] == chunks
+
+    async def test_body_larger_than_chunk_written_piecewise(
+        self,
+        mock_async_client: MagicMock,
+        mock_aiofiles: AsyncMock,
+        tmp_path: Path,
+        monkeypatch: pytest.MonkeyPatch,
+    ) -> None:
+        """A body spanning several chunks is written as several writes that add up."""
+        monkeypatch.setattr(downloader, "DOWNLOAD_CHUNK_SIZE", 8)
+        pdf_bytes = b"%PDF-1.4 " + b"x" * 30
+        mock_response = _make_mock_response(content=pdf_bytes)
+        _patch_httpx_client(mock_async_client, mock_response)
+
+        output = tmp_path / "paper.pdf"
 
-    @patch("pdf_to_png_converter_mcp.downloader.aiofiles.open")
-    @patch("pdf_to_png_converter_mcp.downloader.httpx.AsyncClient")
+        await download_paper("https://example.com/paper.pdf", output)
+
+        writes = [c.args[0] for c in mock_aiofiles.write.await_args_list]
+        assert len(writes) == 5
+        assert all(len(w) <= 8 for w in writes)
+        assert b"".join(writes) == pdf_bytes
+
+    async def test_small_body_read_in_one_shot(
+        self,
+        mock_async_client: MagicMock,
+        mock_aiofiles: AsyncMock,
+        tmp_path: Path,
+    ) -> None:
+        """A small Content-Length is read with a single aread() instead of iterating chunks."""
+        pdf_bytes = b"%PDF-1.4 small"
+        mock_response = _make_mock_response(content=pdf_bytes)
+        mock_response.headers["content-length"] = str(len(pdf_bytes))
+        mock_response.aread = AsyncMock(return_value=pdf_bytes)
+        mock_response.aiter_bytes = MagicMock(side_effect=AssertionError("should not stream"))
+        _patch_httpx_client(mock_async_client, mock_response)
+
+        output = tmp_path / "paper.pdf"
+
+        await download_paper("https://example.com/paper.pdf", output)
+
+        mock_response.aread.assert_awaited_once()
+        mock_aiofiles.write.assert_awaited_once_with(pdf_bytes)
+
+    @pytest.mark.usefixtures("mock_aiofiles")
     async def test_creates_parent_directory(
         self,
-        mock_client_cls: MagicMock,
-        mock_aiofiles_open: MagicMock,
+        mock_async_client: MagicMock,
         tmp_path: Path,
     ) -> None:
         """download_paper must create the parent directory tree if it does not exist."""
         pdf_bytes = b"%PDF-1.4 test"
         mock_response = _make_mock_response(content=pdf_bytes)
-        _patch_httpx_client(mock_client_cls, mock_response)
-        _patch_aiofiles(mock_aiofiles_open)
+        _patch_httpx_client(mock_async_client, mock_response)
 
         # Use a deeply nested path that definitely does not exist yet
         output = tmp_path / "深層" / "子目錄" / "paper.pdf"
         assert not output.parent.exists(), "Parent dir should not exist before download"
 
-        # We need the file to exist for stat() call inside download_paper.
-        # Since aiofiles.open is mocked, the file won't really be written.
-        # We must pre-create the file after mkdir would have run.
-        # Patch output_path.stat instead: use a real Path but pre-create after function
-        # starts.  Easiest: just let mkdir happen (real), then pre-create the file
-        # *before* calling, so stat() works.  But parent doesn't exist yet...
-        #
-        # Strategy: let download_paper call the real mkdir (it will create parents),
-        # then the mocked aiofiles won't write.  stat() will fail.
-        # So we also patch Path.stat on the output.
-        with patch.object(Path, "stat", return_value=MagicMock(st_size=len(pdf_bytes))):
-            result = await download_paper("https://example.com/paper.pdf", output)
+        result = await download_paper("https://example.com/paper.pdf", output)
 
         # The key assertion: the parent directory was created by download_paper
         assert output.parent.exists()
         assert result == output
 
-    @patch("pdf_to_png_converter_mcp.downloader.aiofiles.open")
-    @patch("pdf_to_png_converter_mcp.downloader.httpx.AsyncClient")
-    async def test_http_404(
+    @pytest.mark.usefixtures("mock_aiofiles")
+    async def test_parent_directory_created_off_loop(
+        self,
+        mock_async_client: MagicMock,
+        tmp_path: Path,
+        monkeypatch: pytest.MonkeyPatch,
+    ) -> None:
+        """The directory is created through asyncio.to_thread, not on the event loop."""
+        _patch_httpx_client(mock_async_client, _make_mock_response())
+        to_thread = AsyncMock()
+        monkeypatch.setattr(downloader, "_to_thread", to_thread)
+        output = tmp_path / "paper.pdf"
+
+        await download_paper("https://example.com/paper.pdf", output)
+
+        mkdir_call = to_thread.await_args_list[0]
+        mkdir = mkdir_call.args[0]
+        assert mkdir.__func__ is Path.mkdir
+        assert mkdir.__self__ == output.parent
+        assert mkdir_call.kwargs == {"parents": True, "exist_ok": True}
+
+    async def test_writes_through_part_file(
+        self,
+        mock_async_client: MagicMock,
+        tmp_path: Path,
+    ) -> None:
+        """The body lands in a .part file that is renamed into place once complete."""
+        pdf_bytes = b"%PDF-1.4 " + b"x" * 100
+        _patch_httpx_client(mock_async_client, _make_mock_response(content=pdf_bytes))
+        output = tmp_path / "paper.pdf"
+
+        await download_paper("https://example.com/paper.pdf", output)
+
+        assert output.read_bytes() == pdf_bytes
+        assert not (tmp_path / "paper.pdf.part").exists()
+
+    async def test_partial_write_removed_on_error(
         self,
-        mock_client_cls: MagicMock,
-        mock_aiofiles_open: MagicMock,
+        mock_async_client: MagicMock,
         tmp_path: Path,
     ) -> None:
-        """A 404 response should raise httpx.HTTPStatusError."""
+        """A stream that fails midway leaves neither the .part file nor the final file."""
+        mock_response = _make_mock_response()
+
+        async def _aiter_bytes(chunk_size: int | None = None) -> AsyncIterator[bytes]:
+            yield b"%PDF-1.4 first chunk"
+            raise httpx.ReadError("connection reset")
+
+        mock_response.aiter_bytes = _aiter_bytes
+        _patch_httpx_client(mock_async_client, mock_response)
+        output = tmp_path / "paper.pdf"
+
+        with pytest.raises(httpx.ReadError):
+            await download_paper("https://example.com/paper.pdf", output)
+
+        assert not output.exists()
+        assert not (tmp_path / "paper.pdf.part").exists()
+
+    @pytest.mark.usefixtures("mock_aiofiles")
+    async def test_http_404(self, mock_async_client: MagicMock, tmp_path: Path) -> None:
+        """A 404 response should raise httpx.HTTPStatusError without retrying."""
         request = httpx.Request("GET", "https://example.com/missing.pdf")
         response_404 = httpx.Response(status_code=404, request=request)
         error = httpx.HTTPStatusError(
@@ -143,24 +305,23 @@ class TestDownloadPaper:
             status_code=404,
             raise_for_status_side_effect=error,
         )
-        _patch_httpx_client(mock_client_cls, mock_response)
-        _patch_aiofiles(mock_aiofiles_open)
+        mock_client = _patch_httpx_client(mock_async_client, mock_response)
 
         output = tmp_path / "paper.pdf"
         with pytest.raises(httpx.HTTPStatusError) as exc_info:
             await download_paper("https://example.com/missing.pdf", output)
 
         assert exc_info.value.response.status_code == 404
+        mock_client.stream.assert_called_once()
 
-    @patch("pdf_to_png_converter_mcp.downloader.aiofiles.open")
-    @patch("pdf_to_png_converter_mcp.downloader.httpx.AsyncClient")
+    @pytest.mark.usefixtures("mock_aiofiles")
     async def test_http_500(
         self,
-        mock_client_cls: MagicMock,
-        mock_aiofiles_open: MagicMock,
+        mock_async_client: MagicMock,
         tmp_path: Path,
+        retry_sleep: AsyncMock,
     ) -> None:
-        """A 500 response should raise httpx.HTTPStatusError."""
+        """A persistent 500 is retried MAX_ATTEMPTS times, then raises HTTPStatusError."""
         request = httpx.Request("GET", "https://example.com/error.pdf")
         response_500 = httpx.Response(status_code=500, request=request)
         error = httpx.HTTPStatusError(
@@ -172,68 +333,179 @@ class TestDownloadPaper:
             status_code=500,
             raise_for_status_side_effect=error,
         )
-        _patch_httpx_client(mock_client_cls, mock_response)
-        _patch_aiofiles(mock_aiofiles_open)
+        mock_client = _patch_httpx_client(mock_async_client, mock_response)
 
         output = tmp_path / "paper.pdf"
         with pytest.raises(httpx.HTTPStatusError) as exc_info:
             await download_paper("https://example.com/error.pdf", output)
 
         assert exc_info.value.response.status_code == 500
-
-    @patch("pdf_to_png_converter_mcp.downloader.aiofiles.open")
-    @patch("pdf_to_png_converter_mcp.downloader.httpx.AsyncClient")
-    async def test_timeout(
+        assert mock_client.stream.call_count == MAX_ATTEMPTS
+        assert retry_sleep.await_count == MAX_ATTEMPTS - 1
+        # Backoff grows exponentially between attempts
+        delays = [c.args[0] for c in retry_sleep.await_args_list]
+        assert delays == sorted(delays)
+        assert delays[0] < 1.0
+
+    async def test_http_429_honours_retry_after(
         self,
-        mock_client_cls: MagicMock,
-        mock_aiofiles_open: MagicMock,
+        mock_async_client: MagicMock,
+        mock_aiofiles: AsyncMock,
         tmp_path: Path,
+        retry_sleep: AsyncMock,
     ) -> None:
-        """A timeout during client.get should raise httpx.TimeoutException."""
-        mock_client = AsyncMock()
-        mock_client.get = AsyncMock(side_effect=httpx.TimeoutException("timed out"))
-        mock_client_cls.return_value.__aenter__ = AsyncMock(return_value=mock_client)
-        mock_client_cls.return_value.__aexit__ = AsyncMock(return_value=False)
-        _patch_aiofiles(mock_aiofiles_open)
+        """A 429 with Retry-After waits that long, then the retried request succeeds."""
+        request = httpx.Request("GET", "https://example.com/busy.pdf")
+        response_429 = httpx.Response(
+            status_code=429, request=request, headers={"Retry-After": "2"}
+        )
+        error = httpx.HTTPStatusError(
+            message="429 Too Many Requests",
+            request=request,
+            response=response_429,
+        )
+        busy_response = _make_mock_response(status_code=429, raise_for_status_side_effect=error)
+        ok_response = _make_mock_response()
+        mock_client = _patch_httpx_client(mock_async_client, ok_response)
+        mock_client.stream.return_value.__aenter__ = AsyncMock(
+            side_effect=[busy_response, ok_response]
+        )
+
+        output = tmp_path / "paper.pdf"
+
+        result = await download_paper("https://example.com/busy.pdf", output)
+
+        assert result == output
+        assert mock_client.stream.call_count == 2
+        retry_sleep.assert_awaited_once_with(2.0)
+        mock_aiofiles.write.assert_awaited_once()
+
+    @pytest.mark.usefixtures("retry_sleep", "mock_aiofiles")
+    async def test_timeout(self, mock_async_client: MagicMock, tmp_path: Path) -> None:
+        """A timeout that persists across every retry raises httpx.TimeoutException."""
+        mock_async_client.stream = MagicMock()
+        mock_async_client.stream.return_value.__aenter__ = AsyncMock(
+            side_effect=httpx.TimeoutException("timed out")
+        )
 
         output = tmp_path / "paper.pdf"
         with pytest.raises(httpx.TimeoutException):
             await download_paper("https://example.com/slow.pdf", output)
 
-    @patch("pdf_to_png_converter_mcp.downloader.aiofiles.open")
-    @patch("pdf_to_png_converter_mcp.downloader.httpx.AsyncClient")
-    async def test_non_pdf_content_type(
+        assert mock_async_client.stream.call_count == MAX_ATTEMPTS
+
+    async def test_non_pdf_body(
         self,
-        mock_client_cls: MagicMock,
-        mock_aiofiles_open: MagicMock,
+        mock_async_client: MagicMock,
+        mock_aiofiles: AsyncMock,
         tmp_path: Path,
         caplog: pytest.LogCaptureFixture,
     ) -> None:
-        """Non-PDF content-type should still succeed but emit a warning.
+        """A body without the %PDF- magic bytes still saves but emits a warning.
 
-        The warning only triggers when *both* the content-type lacks 'pdf'
-        AND the URL does not end with '.pdf'.
+        The check looks at the bytes themselves, so it fires even when the
+        server claims application/pdf and the URL ends with '.pdf'.
         """
         html_bytes = b"<html>not a pdf</html>"
-        mock_response = _make_mock_response(
-            content=html_bytes,
-            content_type="text/html",
-        )
-        _patch_httpx_client(mock_client_cls, mock_response)
-        mock_file = _patch_aiofiles(mock_aiofiles_open)
+        mock_response = _make_mock_response(content=html_bytes)
+        _patch_httpx_client(mock_async_client, mock_response)
 
-        # URL does NOT end with .pdf so the warning branch is taken
         output = tmp_path / "paper.pdf"
-        output.parent.mkdir(parents=True, exist_ok=True)
-        output.write_bytes(html_bytes)
 
         with caplog.at_level(logging.WARNING, logger="pdf-to-png-mcp.downloader"):
-            result = await download_paper("https://example.com/paper", output)
+            result = await download_paper("https://example.com/paper.pdf", output)
 
         assert result == output
-        mock_file.write.assert_awaited_once_with(html_bytes)
+        mock_aiofiles.write.assert_awaited_once_with(html_bytes)
         # Verify the warning was logged
-        assert any("Content-Type" in record.message for record in caplog.records)
+        assert any("%PDF-" in record.getMessage() for record in caplog.records)
+
+    @pytest.mark.usefixtures("mock_aiofiles")
+    async def test_pdf_body_with_wrong_content_type(
+        self,
+        mock_async_client: MagicMock,
+        tmp_path: Path,
+        caplog: pytest.LogCaptureFixture,
+    ) -> None:
+        """A real PDF body served as text/html from an extensionless URL is not flagged."""
+        mock_response = _make_mock_response(content=b"\n%PDF-1.7 body", content_type="text/html")
+        _patch_httpx_client(mock_async_client, mock_response)
+
+        with caplog.at_level(logging.WARNING, logger="pdf-to-png-mcp.downloader"):
+            await download_paper("https://example.com/download?id=1", tmp_path / "paper.pdf")
+
+        assert not caplog.records
+
+
+# ===========================================================================
+# TestDownloadPapers
+# ===========================================================================
+
+
+class TestDownloadPapers:
+    """Tests for the download_papers batch helper."""
+
+    async def test_results_in_job_order(self, tmp_path: Path) -> None:
+        """Results follow the job order and failures are returned, not raised."""
+        jobs = [
+            ("https://example.com/a.pdf", tmp_path / "a.pdf"),
+            ("https://example.com/bad.pdf", tmp_path / "bad.pdf"),
+            ("https://example.com/c.pdf", tmp_path / "c.pdf"),
+        ]
+        error = RuntimeError("connection reset")
+
+        async def _fake_download(url: str, output_path: Path) -> Path:
+            if "bad" in url:
+                raise error
+            return output_path
+
+        with patch(
+            "pdf_to_png_converter_mcp.downloader.download_paper",
+            side_effect=_fake_download,
+        ):
+            results = await download_papers(jobs)
+
+        assert results == [tmp_path / "a.pdf", error, tmp_path / "c.pdf"]
+
+    async def test_concurrency_is_bounded(self, tmp_path: Path) -> None:
+        """No more than `concurrency` downloads run at the same time."""
+        jobs = [(f"https://example.com/{i}.pdf", tmp_path / f"{i}.pdf") for i in range(10)]
+        active = 0
+        peak = 0
+
+        async def _fake_download(url: str, output_path: Path) -> Path:
+            nonlocal active, peak
+            active += 1
+            peak = max(peak, active)
+            await asyncio.sleep(0.01)
+            active -= 1
+            return output_path
+
+        with patch(
+            "pdf_to_png_converter_mcp.downloader.download_paper",
+            side_effect=_fake_download,
+        ):
+            results = await download_papers(jobs, concurrency=3)
+
+        assert len(results) == 10
+        assert peak == 3
+
+    @pytest.mark.usefixtures("mock_aiofiles")
+    async def test_many_downloads_share_one_client(
+        self,
+        mock_async_client_cls: MagicMock,
+        mock_async_client: MagicMock,
+        tmp_path: Path,
+    ) -> None:
+        """64 real download_paper calls complete in job order over a single client."""
+        mock_client = _patch_httpx_client(mock_async_client, _make_mock_response())
+        jobs = [(f"https://example.com/{i}.pdf", tmp_path / f"{i}.pdf") for i in range(64)]
+
+        results = await download_papers(jobs)
+
+        assert results == [output_path for _, output_path in jobs]
+        assert mock_client.stream.call_count == 64
+        mock_async_client_cls.assert_called_once()
 
 
 # ===========================================================================
@@ -244,8 +516,7 @@ class TestDownloadPaper:
 class TestSearchPaper:
     """Tests for the search_paper async function."""
 
-    @patch("pdf_to_png_converter_mcp.downloader.httpx.AsyncClient")
-    async def test_success(self, mock_client_cls: MagicMock) -> None:
+    async def test_success(self, mock_async_client: MagicMock) -> None:
         """Successful search returns correctly formatted results."""
         api_data = {
             "data": [
@@ -262,7 +533,7 @@ class TestSearchPaper:
             ],
         }
         mock_response = _make_mock_response(json_data=api_data)
-        _patch_httpx_client(mock_client_cls, mock_response)
+        _patch_httpx_client(mock_async_client, mock_response)
 
         results = await search_paper("attention mechanism")
 
@@ -274,19 +545,18 @@ class TestSearchPaper:
         assert paper["venue"] == "NeurIPS"
         assert paper["pdf_url"] == "https://arxiv.org/pdf/1706.03762"
 
-    @patch("pdf_to_png_converter_mcp.downloader.httpx.AsyncClient")
-    async def test_empty_results(self, mock_client_cls: MagicMock) -> None:
+    async def test_empty_results(self, mock_async_client: MagicMock) -> None:
         """An empty result set from the API returns an empty list."""
         mock_response = _make_mock_response(json_data={"data": []})
-        _patch_httpx_client(mock_client_cls, mock_response)
+        _patch_httpx_client(mock_async_client, mock_response)
 
         results = await search_paper("xyzzy nonexistent topic 12345")
 
         assert results == []
 
-    @patch("pdf_to_png_converter_mcp.downloader.httpx.AsyncClient")
-    async def test_api_error(self, mock_client_cls: MagicMock) -> None:
-        """A 500 API error should propagate as httpx.HTTPStatusError."""
+    @pytest.mark.usefixtures("retry_sleep")
+    async def test_api_error(self, mock_async_client: MagicMock) -> None:
+        """A persistent 500 API error is retried, then propagates as httpx.HTTPStatusError."""
         request = httpx.Request("GET", "https://api.semanticscholar.org/graph/v1/paper/search")
         response_500 = httpx.Response(status_code=500, request=request)
         error = httpx.HTTPStatusError(
@@ -298,15 +568,15 @@ class TestSearchPaper:
             status_code=500,
             raise_for_status_side_effect=error,
         )
-        _patch_httpx_client(mock_client_cls, mock_response)
+        mock_client = _patch_httpx_client(mock_async_client, mock_response)
 
         with pytest.raises(httpx.HTTPStatusError) as exc_info:
             await search_paper("test query")
 
         assert exc_info.value.response.status_code == 500
+        assert mock_client.get.await_count == MAX_ATTEMPTS
 
-    @patch("pdf_to_png_converter_mcp.downloader.httpx.AsyncClient")
-    async def test_author_truncation(self, mock_client_cls: MagicMock) -> None:
+    async def test_author_truncation(self, mock_async_client: MagicMock) -> None:
         """Papers with more than 3 authors get truncated with 'et al.'."""
         api_data = {
             "data": [
@@ -325,15 +595,14 @@ class TestSearchPaper:
             ],
         }
         mock_response = _make_mock_response(json_data=api_data)
-        _patch_httpx_client(mock_client_cls, mock_response)
+        _patch_httpx_client(mock_async_client, mock_response)
 
         results = await search_paper("big collaboration")
 
         assert len(results) == 1
         assert results[0]["authors"] == "Alice, Bob, Charlie et al."
 
-    @patch("pdf_to_png_converter_mcp.downloader.httpx.AsyncClient")
-    async def test_three_authors_no_truncation(self, mock_client_cls: MagicMock) -> None:
+    async def test_three_authors_no_truncation(self, mock_async_client: MagicMock) -> None:
         """Papers with exactly 3 authors should NOT have 'et al.' appended."""
         api_data = {
             "data": [
@@ -351,7 +620,7 @@ class TestSearchPaper:
             ],
         }
         mock_response = _make_mock_response(json_data=api_data)
-        _patch_httpx_client(mock_client_cls, mock_response)
+        _patch_httpx_client(mock_async_client, mock_response)
 
         results = await search_paper("three authors")
 
@@ -359,8 +628,7 @@ class TestSearchPaper:
         assert results[0]["authors"] == "Alice, Bob, Charlie"
         assert "et al." not in results[0]["authors"]
 
-    @patch("pdf_to_png_converter_mcp.downloader.httpx.AsyncClient")
-    async def test_missing_fields(self, mock_client_cls: MagicMock) -> None:
+    async def test_missing_fields(self, mock_async_client: MagicMock) -> None:
         """Papers with missing/absent fields should use safe defaults.
 
         Keys that are entirely absent from the API response trigger the
@@ -379,7 +647,7 @@ class TestSearchPaper:
             ],
         }
         mock_response = _make_mock_response(json_data=api_data)
-        _patch_httpx_client(mock_client_cls, mock_response)
+        _patch_httpx_client(mock_async_client, mock_response)
 
         results = await search_paper("missing fields")
 
@@ -391,8 +659,17 @@ class TestSearchPaper:
         assert paper["venue"] == ""
         assert paper["pdf_url"] == ""
 
-    @patch("pdf_to_png_converter_mcp.downloader.httpx.AsyncClient")
-    async def test_paper_without_open_access(self, mock_client_cls: MagicMock) -> None:
+    async def test_null_authors(self, mock_async_client: MagicMock) -> None:
+        """An explicit null authors field is treated like an empty list."""
+        api_data = {"data": [{"title": "Anonymous", "authors": None}]}
+        mock_response = _make_mock_response(json_data=api_data)
+        _patch_httpx_client(mock_async_client, mock_response)
+
+        results = await search_paper("null authors")
+
+        assert results[0]["authors"] == ""
+
+    async def test_paper_without_open_access(self, mock_async_client: MagicMock) -> None:
         """Papers without openAccessPdf should have an empty pdf_url."""
         api_data = {
             "data": [
@@ -406,7 +683,7 @@ class TestSearchPaper:
             ],
         }
         mock_response = _make_mock_response(json_data=api_data)
-        _patch_httpx_client(mock_client_cls, mock_response)
+        _patch_httpx_client(mock_async_client, mock_response)
 
         results = await search_paper("closed access")
 
@@ -414,3 +691,129 @@ class TestSearchPaper:
         assert results[0]["pdf_url"] == ""
         assert results[0]["title"] == "Closed Access Paper"
         assert results[0]["authors"] == "Author One"
+
+    async def test_search_caches_repeat_calls(self, mock_async_client: MagicMock) -> None:
+        """Equivalent queries within the TTL hit the API once; other limits are separate."""
+        api_data = {"data": [{"title": "Cached", "authors": []}]}
+        mock_client = _patch_httpx_client(
+            mock_async_client, _make_mock_response(json_data=api_data)
+        )
+
+        first = await search_paper("Attention  Is All")
+        second = await search_paper("attention is all")
+        await search_paper("attention is all", max_results=10)
+
+        assert first == second
+        assert mock_client.get.await_count == 2
+
+    async def test_search_cache_hit_returns_copy(self, mock_async_client: MagicMock) -> None:
+        """Mutating a returned result list does not change later cache hits."""
+        api_data = {"data": [{"title": "Cached", "authors": []}]}
+        _patch_httpx_client(mock_async_client, _make_mock_response(json_data=api_data))
+
+        first = await search_paper("copy")
+        first[0]["title"] = "changed"
+        second = await search_paper("copy")
+        second.clear()
+        third = await search_paper("copy")
+
+        assert len(third) == 1
+        assert third[0]["title"] == "Cached"
+
+    async def test_search_cache_expires(self, mock_async_client: MagicMock) -> None:
+        """A cached result older than SEARCH_CACHE_TTL is fetched again."""
+        mock_client = _patch_httpx_client(
+            mock_async_client, _make_mock_response(json_data={"data": []})
+        )
+
+        with patch("pdf_to_png_converter_mcp.downloader.time.monotonic", return_value=0.0):
+            await search_paper("stale")
+        with patch(
+            "pdf_to_png_converter_mcp.downloader.time.monotonic",
+            return_value=SEARCH_CACHE_TTL + 1,
+        ):
+            await search_paper("stale")
+
+        assert mock_client.get.await_count == 2
+
+    async def test_search_errors_not_cached(self, mock_async_client: MagicMock) -> None:
+        """A failed search is not cached, so the next call goes to the API again."""
+        mock_client = _patch_httpx_client(
+            mock_async_client, _make_mock_response(json_data={"data": []})
+        )
+        ok_get = mock_client.get
+        mock_client.get = AsyncMock(side_effect=httpx.ConnectError("down"))
+
+        with pytest.raises(httpx.ConnectError):
+            await search_paper("flaky")
+        mock_client.get = ok_get
+        assert await search_paper("flaky") == []
+
+
+# ===========================================================================
+# TestSharedClient
+# ===========================================================================
+
+
+class TestSharedClient:
+    """Tests for the shared HTTP client used by downloads and searches."""
+
+    async def test_reused_across_calls(
+        self, mock_async_client_cls: MagicMock, mock_async_client: MagicMock
+    ) -> None:
+        """Consecutive searches reuse one pooled client instead of creating a new one."""
+        mock_response = _make_mock_response(json_data={"data": []})
+        _patch_httpx_client(mock_async_client, mock_response)
+
+        await search_paper("first")
+        await search_paper("second")
+
+        mock_async_client_cls.assert_called_once()
+        assert mock_async_client_cls.call_args.kwargs["http2"] is True
+
+    @pytest.mark.usefixtures("mock_aiofiles")
+    async def test_reused_across_downloads_and_searches(
+        self,
+        mock_async_client_cls: MagicMock,
+        mock_async_client: MagicMock,
+        tmp_path: Path,
+    ) -> None:
+        """Downloads and searches share the same pooled client instance."""
+        mock_response = _make_mock_response(json_data={"data": []})
+        mock_client = _patch_httpx_client(mock_async_client, mock_response)
+
+        for i in range(3):
+            output = tmp_path / f"paper{i}.pdf"
+            output.write_bytes(b"%PDF-1.4")
+            await download_paper(f"https://example.com/paper{i}.pdf", output)
+        await search_paper("query")
+
+        mock_async_client_cls.assert_called_once()
+        assert mock_client.stream.call_count == 3
+        mock_client.get.assert_awaited_once()
+
+    async def test_close_client(
+        self, mock_async_client_cls: MagicMock, mock_async_client: MagicMock
+    ) -> None:
+        """close_client closes the shared client and a new one is built afterwards."""
+        mock_async_client.aclose = AsyncMock()
+
+        client = get_client()
+        await close_client()
+
+        client.aclose.assert_awaited_once()
+        assert downloader._client is None
+        get_client()
+        assert mock_async_client_cls.call_count == 2
+
+    @pytest.mark.usefixtures("mock_aiofiles")
+    async def test_injected_client(self, mock_async_client_cls: MagicMock, tmp_path: Path) -> None:
+        """An explicitly passed client is used instead of the shared one."""
+        injected = MagicMock()
+        _patch_httpx_client(injected, _make_mock_response())
+        output = tmp_path / "paper.pdf"
+
+        await download_paper("https://example.com/paper.pdf", output, client=injected)
+
+        injected.stream.assert_called_once()
+        mock_async_client_cls.assert_not_called()
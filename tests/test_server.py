@@ -2,12 +2,23 @@
 
 from __future__ import annotations
 
+import asyncio
+import contextvars
+from collections.abc import Mapping
 from pathlib import Path
+from types import MappingProxyType
 from unittest.mock import AsyncMock, patch
 
-import httpx
+import pytest
+from mcp.server.lowlevel.server import request_ctx
+from mcp.shared.context import RequestContext
+from mcp.types import RequestParams, Tool
+from pyfakefs.fake_filesystem import FakeFilesystem
 
 from pdf_to_png_converter_mcp.server import (
+    _HANDLERS,
+    BATCH_CONCURRENCY,
+    _notify_progress,
     call_tool,
     handle_batch_convert,
     handle_convert_pdf,
@@ -18,6 +29,48 @@ from pdf_to_png_converter_mcp.server import (
     sanitize_filename,
 )
 
+# 超過檔名長度上限的輸入，以及 sanitize_filename 截斷後的長度
+LONG_NAME = "a" * 300
+LONG_NAME_LIMIT = 200
+
+# 搜尋結果樣本：唯讀、模組載入時建立一次，供 TestHandleSearchPaper 共用
+SAMPLE_ATTENTION_PAPER = MappingProxyType(
+    {
+        "title": "Attention Is All You Need",
+        "authors": "Vaswani, Shazeer, Parmar",
+        "year": "2017",
+        "venue": "NeurIPS",
+        "pdf_url": "https://example.com/paper.pdf",
+    }
+)
+SAMPLE_PAPER_A = MappingProxyType(
+    {
+        "title": "Paper A",
+        "authors": "Author A",
+        "year": "2023",
+        "venue": "ICML",
+        "pdf_url": "https://example.com/a.pdf",
+    }
+)
+SAMPLE_PAPER_B = MappingProxyType(
+    {
+        "title": "Paper B",
+        "authors": "Author B",
+        "year": "2024",
+        "venue": "",
+        "pdf_url": "",
+    }
+)
+SAMPLE_MINIMAL_PAPER = MappingProxyType(
+    {
+        "title": "Minimal Paper",
+        "authors": "Someone",
+        "year": "",
+        "venue": "",
+        "pdf_url": "",
+    }
+)
+
 
 # ---------------------------------------------------------------------------
 # TestSanitizeFilename — 保留全部 7 個既有測試
@@ -54,9 +107,8 @@ class TestSanitizeFilename:
 
     def test_long_filename(self) -> None:
         """測試過長檔案名稱被截斷."""
-        long_name = "a" * 300
-        result = sanitize_filename(long_name)
-        assert len(result) == 200
+        result = sanitize_filename(LONG_NAME)
+        assert len(result) == LONG_NAME_LIMIT
 
     def test_empty_filename(self) -> None:
         """測試空檔案名稱."""
@@ -78,26 +130,20 @@ class TestSanitizeFilename:
 class TestListTools:
     """測試 MCP 服務器工具列表."""
 
-    async def test_list_tools(self) -> None:
+    def test_list_tools(self, tool_names: frozenset[str]) -> None:
         """測試工具列表包含所有 5 個工具."""
-        tools = await list_tools()
-        tool_names = {tool.name for tool in tools}
-
         assert "convert_pdf_to_png" in tool_names
         assert "download_paper" in tool_names
         assert "download_and_convert" in tool_names
         assert "batch_convert_pdfs" in tool_names
         assert "search_paper" in tool_names
 
-    async def test_tool_count(self) -> None:
+    def test_tool_count(self, tools: list[Tool]) -> None:
         """測試工具數量為 5."""
-        tools = await list_tools()
         assert len(tools) == 5
 
-    async def test_tool_schemas(self) -> None:
+    def test_tool_schemas(self, tools: list[Tool]) -> None:
         """測試工具 schema 格式正確."""
-        tools = await list_tools()
-
         for tool in tools:
             assert tool.name
             assert tool.description
@@ -105,17 +151,18 @@ class TestListTools:
             assert "type" in tool.inputSchema
             assert tool.inputSchema["type"] == "object"
 
-    async def test_search_paper_tool_schema(self) -> None:
+    def test_search_paper_tool_schema(self, tools_by_name: Mapping[str, Tool]) -> None:
         """測試 search_paper 工具 schema 包含 query 為必要欄位."""
-        tools = await list_tools()
-        search_tool = next(t for t in tools if t.name == "search_paper")
-
-        schema = search_tool.inputSchema
+        schema = tools_by_name["search_paper"].inputSchema
         assert "required" in schema
         assert "query" in schema["required"]
         assert "query" in schema["properties"]
         assert "max_results" in schema["properties"]
 
+    async def test_tools_built_once(self) -> None:
+        """重複呼叫 list_tools 回傳同一份預先建立的工具列表."""
+        assert await list_tools() is await list_tools()
+
 
 # ---------------------------------------------------------------------------
 # TestCallTool
@@ -129,67 +176,59 @@ class TestCallTool:
         assert len(result) == 1
         assert "未知的工具" in result[0].text
 
-    @patch("pdf_to_png_converter_mcp.server.handle_convert_pdf", new_callable=AsyncMock)
-    async def test_routes_to_convert_pdf(self, mock_handler: AsyncMock) -> None:
-        """verify call_tool routes convert_pdf_to_png to handle_convert_pdf."""
-        mock_handler.return_value = "ok"
-        args = {"pdf_path": "dummy.pdf"}
-
-        result = await call_tool("convert_pdf_to_png", args)
-
-        mock_handler.assert_awaited_once_with(args)
-        assert result[0].text == "ok"
-
-    @patch("pdf_to_png_converter_mcp.server.handle_search_paper", new_callable=AsyncMock)
-    async def test_routes_to_search_paper(self, mock_handler: AsyncMock) -> None:
-        """verify call_tool routes search_paper to handle_search_paper."""
-        mock_handler.return_value = "search results"
-        args = {"query": "deep learning"}
-
-        result = await call_tool("search_paper", args)
-
-        mock_handler.assert_awaited_once_with(args)
-        assert result[0].text == "search results"
-
-    @patch("pdf_to_png_converter_mcp.server.handle_download_paper", new_callable=AsyncMock)
-    async def test_routes_to_download_paper(self, mock_handler: AsyncMock) -> None:
-        """verify call_tool routes download_paper to handle_download_paper."""
-        mock_handler.return_value = "downloaded"
-        args = {"url": "http://x", "journal": "J", "title": "T"}
-
-        result = await call_tool("download_paper", args)
-
-        mock_handler.assert_awaited_once_with(args)
-        assert result[0].text == "downloaded"
-
-    @patch("pdf_to_png_converter_mcp.server.handle_download_and_convert", new_callable=AsyncMock)
-    async def test_routes_to_download_and_convert(self, mock_handler: AsyncMock) -> None:
-        """verify call_tool routes download_and_convert to handle_download_and_convert."""
-        mock_handler.return_value = "done"
-        args = {"url": "http://x", "journal": "J", "title": "T"}
-
-        result = await call_tool("download_and_convert", args)
-
-        mock_handler.assert_awaited_once_with(args)
-        assert result[0].text == "done"
-
-    @patch("pdf_to_png_converter_mcp.server.handle_batch_convert", new_callable=AsyncMock)
-    async def test_routes_to_batch_convert(self, mock_handler: AsyncMock) -> None:
-        """verify call_tool routes batch_convert_pdfs to handle_batch_convert."""
-        mock_handler.return_value = "batch done"
-        args = {"folder_path": "/tmp/pdfs"}
+    @pytest.mark.parametrize(
+        ("tool_name", "args"),
+        [
+            ("convert_pdf_to_png", {"pdf_path": "dummy.pdf"}),
+            ("search_paper", {"query": "deep learning"}),
+            ("download_paper", {"url": "http://x", "journal": "J", "title": "T"}),
+            ("download_and_convert", {"url": "http://x", "journal": "J", "title": "T"}),
+            ("batch_convert_pdfs", {"folder_path": "/tmp/pdfs"}),
+        ],
+    )
+    async def test_routes_to_handler(
+        self, tool_name: str, args: dict[str, str], monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """call_tool 依工具名稱把參數交給對應的 handler，並回傳其結果."""
+        mock_handler = AsyncMock(return_value=f"{tool_name} ok")
+        monkeypatch.setitem(_HANDLERS, tool_name, mock_handler)
 
-        result = await call_tool("batch_convert_pdfs", args)
+        result = await call_tool(tool_name, args)
 
         mock_handler.assert_awaited_once_with(args)
-        assert result[0].text == "batch done"
-
-    @patch("pdf_to_png_converter_mcp.server.handle_convert_pdf", new_callable=AsyncMock)
-    async def test_exception_handling(self, mock_handler: AsyncMock) -> None:
+        assert result[0].text == f"{tool_name} ok"
+
+    async def test_invalid_arguments_rejected(self) -> None:
+        """參數不符合 schema 時回傳 '參數錯誤'，且不會呼叫 handler."""
+        mock_handler = AsyncMock(return_value="ok")
+
+        with patch.dict(_HANDLERS, {"convert_pdf_to_png": mock_handler}):
+            missing = await call_tool("convert_pdf_to_png", {})
+            out_of_range = await call_tool("convert_pdf_to_png", {"pdf_path": "x.pdf", "dpi": 10})
+
+        assert "參數錯誤" in missing[0].text
+        assert "pdf_path" in missing[0].text
+        assert "參數錯誤" in out_of_range[0].text
+        mock_handler.assert_not_awaited()
+
+    def test_handler_table(self, tool_names: frozenset[str]) -> None:
+        """每個工具名稱都對應到正確的處理函數，且與工具列表一致."""
+        expected = {
+            "convert_pdf_to_png": handle_convert_pdf,
+            "download_paper": handle_download_paper,
+            "download_and_convert": handle_download_and_convert,
+            "batch_convert_pdfs": handle_batch_convert,
+            "search_paper": handle_search_paper,
+        }
+        assert expected == _HANDLERS
+        assert set(_HANDLERS) == tool_names
+
+    async def test_exception_handling(self) -> None:
         """handler 拋出例外時，call_tool 回傳包含 '錯誤:' 的訊息."""
-        mock_handler.side_effect = RuntimeError("boom")
+        mock_handler = AsyncMock(side_effect=RuntimeError("boom"))
 
-        result = await call_tool("convert_pdf_to_png", {"pdf_path": "x.pdf"})
+        with patch.dict(_HANDLERS, {"convert_pdf_to_png": mock_handler}):
+            result = await call_tool("convert_pdf_to_png", {"pdf_path": "x.pdf"})
 
         assert len(result) == 1
         assert "錯誤:" in result[0].text
@@ -199,6 +238,7 @@ class TestCallTool:
 # ---------------------------------------------------------------------------
 # TestHandleConvertPdf
 # ---------------------------------------------------------------------------
+@pytest.mark.xdist_group("fs")
 class TestHandleConvertPdf:
     """測試 handle_convert_pdf."""
 
@@ -215,11 +255,10 @@ class TestHandleConvertPdf:
         result = await handle_convert_pdf({"pdf_path": str(txt_file)})
         assert "不是 PDF" in result
 
-    @patch("pdf_to_png_converter_mcp.server.convert_pdf_to_png", new_callable=AsyncMock)
     async def test_success(self, mock_convert: AsyncMock, tmp_path: Path) -> None:
         """成功轉換應回傳 '成功' 和 'PNG'."""
         pdf_file = tmp_path / "sample.pdf"
-        pdf_file.write_bytes(b"%PDF-1.4 fake")
+        pdf_file.touch()
 
         mock_convert.return_value = [
             tmp_path / "sample-001.png",
@@ -232,11 +271,10 @@ class TestHandleConvertPdf:
         assert "2" in result
         mock_convert.assert_awaited_once()
 
-    @patch("pdf_to_png_converter_mcp.server.convert_pdf_to_png", new_callable=AsyncMock)
     async def test_conversion_exception(self, mock_convert: AsyncMock, tmp_path: Path) -> None:
         """convert_pdf_to_png 拋出 RuntimeError 時，應回傳 '轉換失敗'."""
         pdf_file = tmp_path / "bad.pdf"
-        pdf_file.write_bytes(b"%PDF-1.4 fake")
+        pdf_file.touch()
 
         mock_convert.side_effect = RuntimeError("poppler not found")
 
@@ -244,12 +282,11 @@ class TestHandleConvertPdf:
         assert "轉換失敗" in result
         assert "poppler not found" in result
 
-    @patch("pdf_to_png_converter_mcp.server.convert_pdf_to_png", new_callable=AsyncMock)
-    async def test_custom_output_dir(self, mock_convert: AsyncMock, tmp_path: Path) -> None:
+    async def test_custom_output_dir(self, mock_convert: AsyncMock, fs: FakeFilesystem) -> None:
         """指定 output_dir 時，應在該目錄建立輸出."""
-        pdf_file = tmp_path / "doc.pdf"
-        pdf_file.write_bytes(b"%PDF-1.4 fake")
-        output_dir = tmp_path / "custom_output"
+        pdf_file = Path("/fake/doc.pdf")
+        fs.create_file(pdf_file)
+        output_dir = Path("/fake/custom_output")
 
         mock_convert.return_value = [output_dir / "doc-001.png"]
 
@@ -274,11 +311,9 @@ class TestHandleConvertPdf:
 class TestHandleDownloadPaper:
     """測試 handle_download_paper."""
 
-    @patch("pdf_to_png_converter_mcp.server.download_paper", new_callable=AsyncMock)
-    async def test_success(self, mock_dl: AsyncMock, tmp_path: Path) -> None:
-        """成功下載應回傳 '成功下載'."""
-        mock_dl.return_value = tmp_path / "Nature" / "My Paper" / "My Paper.pdf"
-
+    @pytest.mark.usefixtures("transport_client")
+    async def test_success(self, tmp_path: Path) -> None:
+        """成功下載應回傳 '成功下載'，並把 PDF 寫到期刊/標題目錄下."""
         result = await handle_download_paper(
             {
                 "url": "https://example.com/paper.pdf",
@@ -291,19 +326,15 @@ class TestHandleDownloadPaper:
         assert "成功下載" in result
         assert "My Paper" in result
         assert "Nature" in result
-        mock_dl.assert_awaited_once()
+        pdf_path = tmp_path / "Nature" / "My Paper" / "My Paper.pdf"
+        assert pdf_path.read_bytes() == b"%PDF-1.4 fake"
 
-    @patch("pdf_to_png_converter_mcp.server.download_paper", new_callable=AsyncMock)
-    async def test_http_error(self, mock_dl: AsyncMock, tmp_path: Path) -> None:
+    @pytest.mark.usefixtures("transport_client")
+    async def test_http_error(self, tmp_path: Path) -> None:
         """HTTP 錯誤時回傳包含 'HTTP' 的訊息."""
-        # 建立 httpx.HTTPStatusError
-        request = httpx.Request("GET", "https://example.com/paper.pdf")
-        response = httpx.Response(status_code=404, request=request)
-        mock_dl.side_effect = httpx.HTTPStatusError("Not Found", request=request, response=response)
-
         result = await handle_download_paper(
             {
-                "url": "https://example.com/paper.pdf",
+                "url": "https://example.com/missing.pdf",
                 "journal": "Nature",
                 "title": "My Paper",
                 "base_dir": str(tmp_path),
@@ -313,10 +344,9 @@ class TestHandleDownloadPaper:
         assert "HTTP" in result
         assert "404" in result
 
-    @patch("pdf_to_png_converter_mcp.server.download_paper", new_callable=AsyncMock)
-    async def test_generic_error(self, mock_dl: AsyncMock, tmp_path: Path) -> None:
+    async def test_generic_error(self, mock_download: AsyncMock, tmp_path: Path) -> None:
         """一般例外應回傳 '下載失敗'."""
-        mock_dl.side_effect = Exception("connection reset")
+        mock_download.side_effect = Exception("connection reset")
 
         result = await handle_download_paper(
             {
@@ -330,10 +360,9 @@ class TestHandleDownloadPaper:
         assert "下載失敗" in result
         assert "connection reset" in result
 
-    @patch("pdf_to_png_converter_mcp.server.download_paper", new_callable=AsyncMock)
-    async def test_sanitizes_filenames(self, mock_dl: AsyncMock, tmp_path: Path) -> None:
+    async def test_sanitizes_filenames(self, mock_download: AsyncMock, tmp_path: Path) -> None:
         """特殊字元應被清理，目錄與檔名不含非法字元."""
-        mock_dl.return_value = tmp_path / "dummy.pdf"
+        mock_download.return_value = tmp_path / "dummy.pdf"
 
         await handle_download_paper(
             {
@@ -345,11 +374,27 @@ class TestHandleDownloadPaper:
         )
 
         # 確認 download_paper 收到的路徑不含非法字元
-        actual_path = mock_dl.call_args[0][1]
+        actual_path = mock_download.call_args[0][1]
         assert ":" not in Path(actual_path).name
         assert "?" not in Path(actual_path).name
         assert "*" not in Path(actual_path).name
 
+    async def test_leaves_directory_to_download_paper(
+        self, mock_download: AsyncMock, tmp_path: Path
+    ) -> None:
+        """處理器本身不在事件迴圈上建立目錄，交由 download_paper 在執行緒中建立."""
+        await handle_download_paper(
+            {
+                "url": "https://example.com/paper.pdf",
+                "journal": "Nature",
+                "title": "My Paper",
+                "base_dir": str(tmp_path),
+            }
+        )
+
+        assert mock_download.await_args.args[1] == tmp_path / "Nature" / "My Paper" / "My Paper.pdf"
+        assert not (tmp_path / "Nature").exists()
+
 
 # ---------------------------------------------------------------------------
 # TestHandleDownloadAndConvert
@@ -357,13 +402,11 @@ class TestHandleDownloadPaper:
 class TestHandleDownloadAndConvert:
     """測試 handle_download_and_convert."""
 
-    @patch("pdf_to_png_converter_mcp.server.convert_pdf_to_png", new_callable=AsyncMock)
-    @patch("pdf_to_png_converter_mcp.server.download_paper", new_callable=AsyncMock)
     async def test_success(
-        self, mock_dl: AsyncMock, mock_convert: AsyncMock, tmp_path: Path
+        self, mock_download: AsyncMock, mock_convert: AsyncMock, tmp_path: Path
     ) -> None:
         """下載和轉換都成功時，結果包含兩個 '✓'."""
-        mock_dl.return_value = tmp_path / "paper.pdf"
+        mock_download.return_value = tmp_path / "paper.pdf"
         mock_convert.return_value = [
             tmp_path / "paper-001.png",
             tmp_path / "paper-002.png",
@@ -381,13 +424,12 @@ class TestHandleDownloadAndConvert:
         assert result.count("✓") == 2
         assert "成功下載" in result
         assert "成功轉換" in result
-        mock_dl.assert_awaited_once()
+        mock_download.assert_awaited_once()
         mock_convert.assert_awaited_once()
 
-    @patch("pdf_to_png_converter_mcp.server.download_paper", new_callable=AsyncMock)
-    async def test_download_fails(self, mock_dl: AsyncMock, tmp_path: Path) -> None:
+    async def test_download_fails(self, mock_download: AsyncMock, tmp_path: Path) -> None:
         """下載失敗時直接回傳 '下載失敗'，不繼續轉換."""
-        mock_dl.side_effect = Exception("network error")
+        mock_download.side_effect = Exception("network error")
 
         result = await handle_download_and_convert(
             {
@@ -400,13 +442,11 @@ class TestHandleDownloadAndConvert:
 
         assert "下載失敗" in result
 
-    @patch("pdf_to_png_converter_mcp.server.convert_pdf_to_png", new_callable=AsyncMock)
-    @patch("pdf_to_png_converter_mcp.server.download_paper", new_callable=AsyncMock)
     async def test_convert_fails_after_download(
-        self, mock_dl: AsyncMock, mock_convert: AsyncMock, tmp_path: Path
+        self, mock_download: AsyncMock, mock_convert: AsyncMock, tmp_path: Path
     ) -> None:
         """下載成功但轉換失敗時，結果包含 '✓' 下載 和 '✗' 轉換."""
-        mock_dl.return_value = tmp_path / "paper.pdf"
+        mock_download.return_value = tmp_path / "paper.pdf"
         mock_convert.side_effect = RuntimeError("poppler crashed")
 
         result = await handle_download_and_convert(
@@ -426,6 +466,7 @@ class TestHandleDownloadAndConvert:
 # ---------------------------------------------------------------------------
 # TestHandleBatchConvert
 # ---------------------------------------------------------------------------
+@pytest.mark.xdist_group("fs")
 class TestHandleBatchConvert:
     """測試 handle_batch_convert."""
 
@@ -447,28 +488,22 @@ class TestHandleBatchConvert:
         result = await handle_batch_convert({"folder_path": str(tmp_path)})
         assert "找不到任何 PDF" in result
 
-    @patch("pdf_to_png_converter_mcp.server.convert_pdf_to_png", new_callable=AsyncMock)
-    async def test_batch_success(self, mock_convert: AsyncMock, tmp_path: Path) -> None:
+    async def test_batch_success(self, mock_convert: AsyncMock, fs: FakeFilesystem) -> None:
         """兩個 PDF 都成功轉換時，結果顯示成功數量為 2."""
-        pdf1 = tmp_path / "a.pdf"
-        pdf2 = tmp_path / "b.pdf"
-        pdf1.write_bytes(b"%PDF-1.4 fake")
-        pdf2.write_bytes(b"%PDF-1.4 fake")
+        fs.create_file("/fake/a.pdf")
+        fs.create_file("/fake/b.pdf")
 
         mock_convert.return_value = [Path("dummy-001.png")]
 
-        result = await handle_batch_convert({"folder_path": str(tmp_path)})
+        result = await handle_batch_convert({"folder_path": "/fake"})
 
         assert "2/2" in result
         assert mock_convert.await_count == 2
 
-    @patch("pdf_to_png_converter_mcp.server.convert_pdf_to_png", new_callable=AsyncMock)
-    async def test_batch_partial_failure(self, mock_convert: AsyncMock, tmp_path: Path) -> None:
+    async def test_batch_partial_failure(self, mock_convert: AsyncMock, fs: FakeFilesystem) -> None:
         """一個成功一個失敗時，結果顯示 1/2."""
-        pdf1 = tmp_path / "good.pdf"
-        pdf2 = tmp_path / "bad.pdf"
-        pdf1.write_bytes(b"%PDF-1.4 fake")
-        pdf2.write_bytes(b"%PDF-1.4 fake")
+        fs.create_file("/fake/good.pdf")
+        fs.create_file("/fake/bad.pdf")
 
         # 第一次呼叫成功，第二次拋出例外
         mock_convert.side_effect = [
@@ -476,19 +511,18 @@ class TestHandleBatchConvert:
             RuntimeError("conversion failed"),
         ]
 
-        result = await handle_batch_convert({"folder_path": str(tmp_path)})
+        result = await handle_batch_convert({"folder_path": "/fake"})
 
         assert "1/2" in result
         assert "✓" in result
         assert "✗" in result
 
-    @patch("pdf_to_png_converter_mcp.server.convert_pdf_to_png", new_callable=AsyncMock)
     async def test_non_recursive(self, mock_convert: AsyncMock, tmp_path: Path) -> None:
         """recursive=False 時，子資料夾中的 PDF 不被搜尋."""
         subfolder = tmp_path / "sub"
         subfolder.mkdir()
         pdf_in_sub = subfolder / "hidden.pdf"
-        pdf_in_sub.write_bytes(b"%PDF-1.4 fake")
+        pdf_in_sub.touch()
 
         result = await handle_batch_convert(
             {
@@ -500,7 +534,6 @@ class TestHandleBatchConvert:
         assert "找不到任何 PDF" in result
         mock_convert.assert_not_awaited()
 
-    @patch("pdf_to_png_converter_mcp.server.convert_pdf_to_png", new_callable=AsyncMock)
     async def test_recursive_finds_subfolder_pdfs(
         self, mock_convert: AsyncMock, tmp_path: Path
     ) -> None:
@@ -508,7 +541,7 @@ class TestHandleBatchConvert:
         subfolder = tmp_path / "sub"
         subfolder.mkdir()
         pdf_in_sub = subfolder / "nested.pdf"
-        pdf_in_sub.write_bytes(b"%PDF-1.4 fake")
+        pdf_in_sub.touch()
 
         mock_convert.return_value = [Path("nested-001.png")]
 
@@ -517,6 +550,134 @@ class TestHandleBatchConvert:
         assert "1/1" in result
         mock_convert.assert_awaited_once()
 
+    async def test_matches_extension_case_insensitively(
+        self, mock_convert: AsyncMock, tmp_path: Path
+    ) -> None:
+        """副檔名大小寫不同的 PDF 也會被找到，其他檔案則略過."""
+        (tmp_path / "upper.PDF").touch()
+        (tmp_path / "lower.pdf").touch()
+        (tmp_path / "notes.txt").write_text("hello", encoding="utf-8")
+
+        mock_convert.return_value = [Path("dummy-001.png")]
+
+        result = await handle_batch_convert({"folder_path": str(tmp_path)})
+
+        assert "2/2" in result
+        converted = {call.args[0].name for call in mock_convert.await_args_list}
+        assert converted == {"upper.PDF", "lower.pdf"}
+
+    async def test_reports_progress_per_file(
+        self,
+        mock_convert: AsyncMock,
+        mock_notify: AsyncMock,
+        tmp_path: Path,
+    ) -> None:
+        """每個檔案完成時都會送出一則進度通知，失敗也不例外."""
+        (tmp_path / "good.pdf").touch()
+        (tmp_path / "bad.pdf").touch()
+
+        async def fake_convert(
+            pdf_path: Path, output_dir: Path, dpi: int, workers: int
+        ) -> list[Path]:
+            if pdf_path.stem == "bad":
+                raise RuntimeError("conversion failed")
+            return [output_dir / f"{pdf_path.stem}-001.png"]
+
+        mock_convert.side_effect = fake_convert
+
+        result = await handle_batch_convert({"folder_path": str(tmp_path)})
+
+        calls = [call.args for call in mock_notify.await_args_list]
+        assert [(done, total) for done, total, _ in calls] == [(1, 2), (2, 2)]
+        messages = sorted(message for _, _, message in calls)
+        assert messages == ["✓ good.pdf: 1 個 PNG", "✗ bad.pdf: conversion failed"]
+        assert result.endswith(("✓ good.pdf: 1 個 PNG", "✗ bad.pdf: conversion failed"))
+
+    @patch("pdf_to_png_converter_mcp.server.os.cpu_count", return_value=8)
+    async def test_converts_concurrently_with_bound(self, _cpu: object, tmp_path: Path) -> None:
+        """檔案層級與頁面層級的平行度相乘不超過 CPU 數."""
+        for i in range(5):
+            (tmp_path / f"doc{i}.pdf").touch()
+
+        in_flight = 0
+        peak = 0
+        worker_counts: set[int] = set()
+
+        async def fake_convert(
+            pdf_path: Path, output_dir: Path, dpi: int, workers: int
+        ) -> list[Path]:
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            worker_counts.add(workers)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+            return [output_dir / f"{pdf_path.stem}-001.png"]
+
+        with patch("pdf_to_png_converter_mcp.server.convert_pdf_to_png", new=fake_convert):
+            result = await handle_batch_convert({"folder_path": str(tmp_path)})
+
+        assert "5/5" in result
+        assert peak == BATCH_CONCURRENCY
+        assert worker_counts == {8 // BATCH_CONCURRENCY}
+        assert peak * max(worker_counts) <= 8
+
+    @patch("pdf_to_png_converter_mcp.server.os.cpu_count", return_value=8)
+    async def test_single_file_gets_all_workers(
+        self, _cpu: object, mock_convert: AsyncMock, tmp_path: Path
+    ) -> None:
+        """只有一個 PDF 時，該檔案可使用全部 CPU 核心渲染."""
+        (tmp_path / "only.pdf").touch()
+        mock_convert.return_value = [Path("only-001.png")]
+
+        await handle_batch_convert({"folder_path": str(tmp_path)})
+
+        assert mock_convert.await_args.kwargs["workers"] == 8
+
+
+# ---------------------------------------------------------------------------
+# TestNotifyProgress
+# ---------------------------------------------------------------------------
+class TestNotifyProgress:
+    """測試 _notify_progress 送出的 MCP 進度通知."""
+
+    @staticmethod
+    def _enter_request(progress_token: str | None) -> tuple[AsyncMock, contextvars.Token]:
+        """模擬工具呼叫中的請求上下文，回傳假的 session 與還原用的 token."""
+        session = AsyncMock()
+        meta = RequestParams.Meta(progressToken=progress_token)
+        token = request_ctx.set(
+            RequestContext(request_id=7, meta=meta, session=session, lifespan_context=None)
+        )
+        return session, token
+
+    async def test_sends_progress_notification(self) -> None:
+        """客戶端提供 progressToken 時送出帶有進度與請求 ID 的通知."""
+        session, token = self._enter_request("tok")
+        try:
+            await _notify_progress(1, 3, "✓ a.pdf: 2 個 PNG")
+        finally:
+            request_ctx.reset(token)
+
+        session.send_progress_notification.assert_awaited_once_with(
+            "tok", 1, 3, "✓ a.pdf: 2 個 PNG", related_request_id="7"
+        )
+        session.send_log_message.assert_not_called()
+
+    async def test_skips_without_progress_token(self) -> None:
+        """客戶端未要求進度時不送出任何通知."""
+        session, token = self._enter_request(None)
+        try:
+            await _notify_progress(1, 3, "✓ a.pdf: 2 個 PNG")
+        finally:
+            request_ctx.reset(token)
+
+        session.send_progress_notification.assert_not_called()
+
+    async def test_noop_outside_request(self) -> None:
+        """不在請求中呼叫時直接略過，不拋出例外."""
+        await _notify_progress(1, 1, "✓ a.pdf: 1 個 PNG")
+
 
 # ---------------------------------------------------------------------------
 # TestHandleSearchPaper
@@ -524,17 +685,10 @@ class TestHandleBatchConvert:
 class TestHandleSearchPaper:
     """測試 handle_search_paper."""
 
-    @patch("pdf_to_png_converter_mcp.server.search_paper", new_callable=AsyncMock)
     async def test_success(self, mock_search: AsyncMock) -> None:
         """搜尋到結果時，回傳包含論文標題的格式化文字."""
         mock_search.return_value = [
-            {
-                "title": "Attention Is All You Need",
-                "authors": "Vaswani, Shazeer, Parmar",
-                "year": "2017",
-                "venue": "NeurIPS",
-                "pdf_url": "https://example.com/paper.pdf",
-            },
+            SAMPLE_ATTENTION_PAPER,
         ]
 
         result = await handle_search_paper({"query": "transformer"})
@@ -546,7 +700,6 @@ class TestHandleSearchPaper:
         assert "transformer" in result
         mock_search.assert_awaited_once_with("transformer", 5)
 
-    @patch("pdf_to_png_converter_mcp.server.search_paper", new_callable=AsyncMock)
     async def test_no_results(self, mock_search: AsyncMock) -> None:
         """搜尋無結果時回傳 '找不到'."""
         mock_search.return_value = []
@@ -555,7 +708,6 @@ class TestHandleSearchPaper:
 
         assert "找不到" in result
 
-    @patch("pdf_to_png_converter_mcp.server.search_paper", new_callable=AsyncMock)
     async def test_search_error(self, mock_search: AsyncMock) -> None:
         """搜尋拋出例外時回傳 '搜尋失敗'."""
         mock_search.side_effect = Exception("API timeout")
@@ -565,7 +717,6 @@ class TestHandleSearchPaper:
         assert "搜尋失敗" in result
         assert "API timeout" in result
 
-    @patch("pdf_to_png_converter_mcp.server.search_paper", new_callable=AsyncMock)
     async def test_custom_max_results(self, mock_search: AsyncMock) -> None:
         """指定 max_results 時，正確傳遞給 search_paper."""
         mock_search.return_value = []
@@ -574,24 +725,11 @@ class TestHandleSearchPaper:
 
         mock_search.assert_awaited_once_with("GAN", 10)
 
-    @patch("pdf_to_png_converter_mcp.server.search_paper", new_callable=AsyncMock)
     async def test_multiple_results_formatted(self, mock_search: AsyncMock) -> None:
         """多筆結果時，每篇論文都被格式化輸出."""
         mock_search.return_value = [
-            {
-                "title": "Paper A",
-                "authors": "Author A",
-                "year": "2023",
-                "venue": "ICML",
-                "pdf_url": "https://example.com/a.pdf",
-            },
-            {
-                "title": "Paper B",
-                "authors": "Author B",
-                "year": "2024",
-                "venue": "",
-                "pdf_url": "",
-            },
+            SAMPLE_PAPER_A,
+            SAMPLE_PAPER_B,
         ]
 
         result = await handle_search_paper({"query": "test"})
@@ -603,17 +741,10 @@ class TestHandleSearchPaper:
         # Paper B has no venue and no pdf_url — they should not appear
         # (the handler only prints them if truthy)
 
-    @patch("pdf_to_png_converter_mcp.server.search_paper", new_callable=AsyncMock)
     async def test_paper_without_optional_fields(self, mock_search: AsyncMock) -> None:
         """論文缺少 year, venue, pdf_url 等可選欄位時仍正常格式化."""
         mock_search.return_value = [
-            {
-                "title": "Minimal Paper",
-                "authors": "Someone",
-                "year": "",
-                "venue": "",
-                "pdf_url": "",
-            },
+            SAMPLE_MINIMAL_PAPER,
         ]
 
         result = await handle_search_paper({"query": "minimal"})